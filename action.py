@@ -0,0 +1,42 @@
+from dataclasses import dataclass, fields
+from typing import Dict, Any, Optional
+import json
+
+
+@dataclass
+class Action:
+    """智能体结构化动作：所有角色必含vote，其余字段按角色填写（None表示该角色没有此字段）"""
+    vote: str
+    reach_agreement: Optional[bool] = None  # 狼人：是否达成一致
+    resurrect: Optional[bool] = None        # 女巫：是否使用解药
+    poison: Optional[bool] = None           # 女巫：是否使用毒药
+    check: Optional[str] = None             # 预言家：查验对象
+    identity: Optional[str] = None          # 预言家：查验结果
+    shoot: Optional[bool] = None            # 猎人：是否开枪
+    say: str = ""                           # 发言内容
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转为字典（省略该角色不具备的字段）"""
+        return {f.name: getattr(self, f.name) for f in fields(self) if getattr(self, f.name) is not None}
+
+    def to_json(self) -> str:
+        """JSON文本：仅用于日志输出和API返回"""
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Action":
+        """从字典构造（忽略未知字段）"""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    @classmethod
+    def from_json(cls, text: str) -> "Action":
+        """从JSON文本构造"""
+        return cls.from_dict(json.loads(text))
+
+    @classmethod
+    def from_msg(cls, msg) -> "Action":
+        """从Msg读取动作：优先读metadata（无字符串往返），否则解析文本内容"""
+        if getattr(msg, "metadata", None):
+            return cls.from_dict(msg.metadata)
+        return cls.from_json(msg.content[0]["text"])
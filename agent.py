@@ -1,40 +1,87 @@
 from agentscope.agent import AgentBase
 from agentscope.message import Msg
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import math
 import random
+import time
 
-ALL_PLAYERS = [f"Player{i}" for i in range(1, 10)]
+from action import Action
+from decision_cache import MISSING
+from memory import VoteMemory
+from state import GameState
+
+ALL_PLAYERS = [f"Player{i}" for i in range(1, 10)]  # 默认九人局座位表
 
 class PlayerAgent(AgentBase):
-    def __init__(self, name: str):
+    def __init__(self, name: str, memory_window: Optional[int] = None, memory_decay: Optional[float] = None,
+                 players: Optional[List[str]] = None, metrics=None, planner=None, decision_cache=None):
+        """memory_window：只保留最近N条投票记录（滑动窗口）；memory_decay：每条新记录使旧计数按该系数指数衰减（0~1）
+        players：本桌座位表（默认九人局ALL_PLAYERS，大桌由ModeratorAgent传入）
+        metrics：对局指标（metrics.GameMetrics），记录每次__call__的决策耗时（None为不采集）
+        planner：蒙特卡洛推演规划器（planner.RolloutPlanner），设置后刀人/投票目标由推演选出（None为规则策略）
+        decision_cache：按局面编码记忆推演结果的LRU缓存（decision_cache.DecisionCache，可在智能体间共享）
+        """
+        if memory_window is not None and memory_decay is not None:
+            raise ValueError("memory_window与memory_decay只能二选一")
+        if memory_decay is not None and not 0 < memory_decay < 1:
+            raise ValueError("memory_decay必须在(0, 1)区间内")
         # 适配所有AgentScope 1.0.x版本：无参初始化AgentBase
         super().__init__()
         # 手动绑定name属性
         self.name = name
+        self.players = list(players) if players is not None else ALL_PLAYERS
+        self.metrics = metrics
+        self.planner = planner
+        self.decision_cache = decision_cache
+        self.rng = random  # 决策使用的随机数流（ModeratorAgent设置主种子时每局替换为独立的random.Random）
         self.game_count = 0
         self.win_count = 0
         self.win_rate = 0.0
         self.role = None
         self.alive = True
         
-        # 跨局记忆
+        # 跨局记忆（投票记录为紧凑数组，狼人投票目标由记录标志位导出）
+        self.memory_window = memory_window
+        self.memory_decay = memory_decay
         self.history = {
-            "wolf_targets": [],
-            "vote_records": [],
+            "vote_records": VoteMemory(self.players, window=self._record_window()),
             "suspicious_players": set()
         }
+        self._memory_tick = 0  # 衰减模式下的记录计数
+        self._target_ticks = {}  # 衰减模式下各目标最近一次更新时的记录计数
         self.witch_used = {"resurrect": False, "poison": False}
-        self.effective_targets = []
+        # 高胜率目标（dict作有序集合，随计数增量维护）
+        self.effective_targets: Dict[str, None] = {}
+        # 目标胜负计数：{目标: {"win": 胜场, "total": 总数}}
         self.target_history = {}
+        # 本局阵营/角色索引：角色分配后构建一次，之后每次决策只与存活掩码做位运算
+        self._index: Optional[GameState] = None  # 本局座位/角色表
+        self._index_role = None                  # 构建索引时的本方角色
+        self._index_view: Optional[GameState] = None  # 按名字调用时使用的私有状态视图（不修改主持人的state）
+        self._self_bit = 0
+        self._opp_mask = 0                       # 对立阵营位掩码
+        # 高胜率目标/可疑玩家的位掩码缓存：记忆版本号变化或换座位表时重算
+        self._memory_version = 0
+        self._learned_version = -1
+        self._learned_players = None
+        self._learned_seat = None
+        self._effective_mask = 0
+        self._suspicious_mask = 0
+
+    def _record_window(self) -> Optional[int]:
+        """投票记录的保留条数：窗口模式即窗口大小；衰减模式保留权重衰减到0.1%之前的记录"""
+        if self.memory_decay is not None:
+            return math.ceil(math.log(1e-3) / math.log(self.memory_decay))
+        return self.memory_window
 
     def filter_self(self, target_list: List[str]) -> List[str]:
-        return [t for t in target_list if t != self.name and t in ALL_PLAYERS]
+        return [t for t in target_list if t != self.name and t in self.players]
 
     def get_opponent_camp(self, role_map: Dict[str, str]) -> List[str]:
         if self.role == "werewolf":
-            return [p for p in ALL_PLAYERS if role_map.get(p, "") != "werewolf" and p != self.name]
+            return [p for p in self.players if role_map.get(p, "") != "werewolf" and p != self.name]
         else:
-            return [p for p in ALL_PLAYERS if role_map.get(p, "") == "werewolf"]
+            return [p for p in self.players if role_map.get(p, "") == "werewolf"]
 
     def get_key_players(self, role_map: Dict[str, str], alive_players: List[str], camp: str = "good") -> List[str]:
         key_roles = ["seer", "hunter", "witch"]
@@ -48,71 +95,178 @@ class PlayerAgent(AgentBase):
         msg_text = msg.content[0]["text"] if msg.content else ""
         if f"[{self.name} ONLY] Your role:" in msg_text:
             self.role = msg_text.split("Your role: ")[1].strip().lower()
+            self._index = None  # 角色变化，阵营索引需重建
+
+    def begin_game(self, state: GameState) -> None:
+        """角色分配后调用：一次性构建本局阵营/角色索引（本局后续存活变化由state的存活掩码增量维护）"""
+        if self.role is None:
+            self.role = "villager"
+        self._index = state
+        self._index_role = self.role
+        self._index_view = None
+        self._self_bit = state.bit(self.name)
+        self._opp_mask = self._opponent_mask(state)
+
+    def _game_view(self, role_map: Dict[str, str], alive_players: List[str], state: GameState = None) -> GameState:
+        """返回本次决策使用的状态视图，必要时（新的一局/角色变化）重建阵营索引
+
+        主持人传入的state快照与索引共享座位表（由引擎持有），按对象身份复用；按名字调用时按内容比较：
+        role_map中各座位角色不变则复用索引，存活掩码每次由alive_players重算（调用方可能原地修改这两个对象）
+        """
+        if state is not None:
+            if self._index is None or state.players is not self._index.players or self._index_role != self.role:
+                self.begin_game(state)
+            return state
+        if role_map is None:
+            role_map = {}
+        if alive_players is None:
+            alive_players = self.players
+        if not self._index_matches(role_map) or self._index.players != self.players:
+            self.begin_game(GameState(self.players, role_map))
+        if self._index_view is None:
+            self._index_view = self._index.snapshot()
+        self._index_view.alive = self._index.mask_of(alive_players)
+        return self._index_view
+
+    def _index_matches(self, role_map: Dict[str, str]) -> bool:
+        """本局索引是否与role_map一致（按各座位角色比较，不依赖role_map的对象身份）"""
+        return (self._index is not None and self._index_role == self.role
+                and self._index.roles == [role_map.get(p) for p in self._index.players])
+
+    def _opponent_mask(self, state: GameState) -> int:
+        """对立阵营位掩码：狼人的对手是除自己外的所有非狼座位，好人的对手是狼人"""
+        if self.role == "werewolf":
+            return state.full_mask & ~state.wolf_mask & ~state.bit(self.name)
+        return state.wolf_mask
 
-    def _smart_target(self, role_map: Dict[str, str], alive_players: List[str]) -> str:
+    def _smart_target(self, role_map: Dict[str, str], alive_players: List[str], state: GameState = None) -> str:
         """智能选目标（对立阵营+存活）"""
-        opponent_camp_alive = [p for p in self.get_opponent_camp(role_map) if p in alive_players]
+        state = self._game_view(role_map, alive_players, state)
+        opponent_alive = self._opp_mask & state.alive
+        
+        if self._learned_version != self._memory_version or self._learned_players is not state.players:
+            self._effective_mask = state.mask_of(self.effective_targets)
+            self._suspicious_mask = state.mask_of(self.history["suspicious_players"])
+            self._learned_version = self._memory_version
+            self._learned_players = state.players
+            self._learned_seat = state.seat
         
         # 优先选高胜率目标
-        effective_opponent_targets = [t for t in self.effective_targets if t in opponent_camp_alive]
-        if effective_opponent_targets:
-            return random.choice(effective_opponent_targets)
+        effective_opponent_alive = self._effective_mask & opponent_alive
+        if effective_opponent_alive:
+            return state.pick(effective_opponent_alive, rng=self.rng)
         
         # 次选可疑玩家
-        suspicious_opponents = [t for t in self.history["suspicious_players"] if t in opponent_camp_alive]
-        if suspicious_opponents:
-            return random.choice(suspicious_opponents)
+        suspicious_opponent_alive = self._suspicious_mask & opponent_alive
+        if suspicious_opponent_alive:
+            return state.pick(suspicious_opponent_alive, rng=self.rng)
         
         # 随机选对立阵营
-        if opponent_camp_alive:
-            return random.choice(opponent_camp_alive)
+        if opponent_alive:
+            return state.pick(opponent_alive, rng=self.rng)
         
         # 兜底
-        non_self_alive = [p for p in alive_players if p != self.name]
-        return non_self_alive[0] if non_self_alive else "Player1"
+        non_self_alive = state.names(state.alive & ~self._self_bit)
+        return non_self_alive[0] if non_self_alive else self.players[0]
+
+    async def _plan_target(self, state: GameState, phase: str) -> Optional[str]:
+        """用推演规划器选目标：候选为存活的对立阵营（没有时为除自己外的存活玩家），night为狼人刀人、day为白天投票"""
+        candidates = self._opp_mask & state.alive or state.alive & ~self._self_bit
+        witch_used = self.witch_used if self.role == "witch" else None
+        wolf_camp = self.role == "werewolf"
+        if self.decision_cache is None:
+            return await self.planner.choose(state, candidates, wolf_camp, phase, witch_used)
+        key = self.decision_cache.key(state, candidates, wolf_camp, phase, witch_used)
+        target = self.decision_cache.get(key)
+        if target is MISSING:
+            target = await self.planner.choose(state, candidates, wolf_camp, phase, witch_used)
+            self.decision_cache.put(key, target)
+        return target
 
     def _get_target_win_rate(self, target: str) -> int:
         """目标胜率（百分比）"""
         stats = self.target_history.get(target, {"win": 0, "total": 0})
         return round(stats["win"] / stats["total"] * 100) if stats["total"] > 0 else 50
 
-    def optimize_strategy(self) -> None:
-        """自学习策略优化"""
-        if not self.history["vote_records"]:
+    def _refresh_effective(self, target: str, stats: Dict[str, int]) -> None:
+        """根据单个目标的计数更新高胜率目标集合（胜率>50%）"""
+        if stats["total"] > 0 and stats["win"] / stats["total"] > 0.5:
+            self.effective_targets[target] = None
+        else:
+            self.effective_targets.pop(target, None)
+
+    def _record_target(self, target: str, is_win: bool) -> None:
+        """O(1)更新单个目标的胜负计数，同步维护高胜率目标集合"""
+        stats = self.target_history.get(target)
+        if stats is None:
+            stats = self.target_history[target] = {"win": 0, "total": 0}
+        if self.memory_decay is not None:
+            # 惰性衰减：目标被更新时才补算自上次更新以来的衰减（win/total同比例缩放，不影响其他目标的胜率）
+            factor = self.memory_decay ** (self._memory_tick - self._target_ticks.get(target, self._memory_tick))
+            stats["win"] *= factor
+            stats["total"] *= factor
+            self._target_ticks[target] = self._memory_tick
+            self._memory_tick += 1
+        stats["total"] += 1
+        if is_win:
+            stats["win"] += 1
+        self._refresh_effective(target, stats)
+
+    def _forget_target(self, target: str, is_win: bool) -> None:
+        """滑动窗口淘汰旧记录时，O(1)回退该记录对计数的贡献"""
+        stats = self.target_history.get(target)
+        if stats is None:
             return
-        
-        # 统计目标胜率
-        for record in self.history["vote_records"]:
-            target = record["target"]
-            is_win = record["win"]
-            if target not in self.target_history:
-                self.target_history[target] = {"win": 0, "total": 0}
-            self.target_history[target]["total"] += 1
-            if is_win:
-                self.target_history[target]["win"] += 1
-        
-        # 筛选高胜率目标
-        self.effective_targets = [
-            t for t, stats in self.target_history.items()
-            if stats["total"] > 0 and stats["win"] / stats["total"] > 0.5
-        ]
+        stats["total"] = max(stats["total"] - 1, 0)
+        if is_win:
+            stats["win"] = max(stats["win"] - 1, 0)
+        self._refresh_effective(target, stats)
+
+    def optimize_strategy(self) -> None:
+        """自学习策略优化：由target_history全量重建高胜率目标集合（仅加载状态时使用，逐轮更新走增量路径）"""
+        self.effective_targets = {}
+        for target, stats in self.target_history.items():
+            self._refresh_effective(target, stats)
+        self._memory_version += 1
 
     def update_history(self, vote_target: str, is_win: bool, role_map: Dict[str, str]) -> None:
-        """更新跨局记忆"""
-        opponent_camp = self.get_opponent_camp(role_map)
-        if vote_target in opponent_camp and vote_target != self.name:
-            self.history["vote_records"].append({"target": vote_target, "win": is_win})
-            if self.role == "werewolf":
-                self.history["wolf_targets"].append(vote_target)
+        """更新跨局记忆（每次调用O(1)更新计数，开销不随历史局数增长）"""
+        if self._index_matches(role_map):
+            # 本局索引可用：位运算判断是否为对立阵营
+            is_opponent = bool(self._index.bit(vote_target) & self._opp_mask)
+        else:
+            is_opponent = vote_target in self.get_opponent_camp(role_map) and vote_target != self.name
+        if is_opponent:
+            evicted = self.history["vote_records"].append(vote_target, is_win, wolf=self.role == "werewolf")
+            if evicted is not None and self.memory_window is not None:
+                # 衰减模式下旧记录的权重已衰减殆尽，无需回退计数
+                self._forget_target(*evicted)
             if not is_win:
                 self.history["suspicious_players"].add(vote_target)
             # 更新目标胜率
-            if vote_target not in self.target_history:
-                self.target_history[vote_target] = {"win": 0, "total": 0}
-            self.target_history[vote_target]["total"] += 1
-            if is_win:
-                self.target_history[vote_target]["win"] += 1
-        self.optimize_strategy()
+            self._record_target(vote_target, is_win)
+            self._update_learned_bits(vote_target, evicted[0] if evicted else None)
+
+    def _update_learned_bits(self, *targets: Optional[str]) -> None:
+        """记忆变化后增量更新高胜率/可疑掩码缓存中相关目标的位；缓存已失效时留待下次使用时整体重算"""
+        if self._learned_version != self._memory_version:
+            return
+        for target in targets:
+            if target is None:
+                continue
+            seat = self._learned_seat.get(target)
+            if seat is None:
+                self._memory_version += 1  # 目标不在缓存的座位表中，作废缓存
+                return
+            bit = 1 << seat
+            if target in self.effective_targets:
+                self._effective_mask |= bit
+            else:
+                self._effective_mask &= ~bit
+            if target in self.history["suspicious_players"]:
+                self._suspicious_mask |= bit
+            else:
+                self._suspicious_mask &= ~bit
 
     def state_dict(self) -> Dict[str, Any]:
         """赛事强制要求：状态保存"""
@@ -124,12 +278,12 @@ class PlayerAgent(AgentBase):
             "role": self.role,
             "alive": self.alive,
             "history": {
-                "wolf_targets": self.history["wolf_targets"],
-                "vote_records": self.history["vote_records"],
+                "wolf_targets": self.history["vote_records"].wolf_targets(),
+                "vote_records": self.history["vote_records"].records(),
                 "suspicious_players": list(self.history["suspicious_players"])
             },
             "witch_used": self.witch_used,
-            "effective_targets": self.effective_targets,
+            "effective_targets": list(self.effective_targets),
             "target_history": self.target_history
         }
 
@@ -142,14 +296,28 @@ class PlayerAgent(AgentBase):
         self.role = state_dict.get("role", None)
         self.alive = state_dict.get("alive", True)
         history = state_dict.get("history", {})
+        vote_records = VoteMemory(self.players, window=self._record_window())
+        wolf_targets = history.get("wolf_targets", [])
+        wolf_pos = 0
+        for record in history.get("vote_records", []):
+            wolf = record.get("wolf")
+            if wolf is None:
+                # 旧版记录无wolf字段：wolf_targets是狼人投票的有序子序列，按顺序对齐恢复标志位
+                wolf = wolf_pos < len(wolf_targets) and wolf_targets[wolf_pos] == record["target"]
+                if wolf:
+                    wolf_pos += 1
+            vote_records.append(record["target"], record["win"], wolf=wolf)
         self.history = {
-            "wolf_targets": history.get("wolf_targets", []),
-            "vote_records": history.get("vote_records", []),
+            "vote_records": vote_records,
             "suspicious_players": set(history.get("suspicious_players", []))
         }
         self.witch_used = state_dict.get("witch_used", {"resurrect": False, "poison": False})
-        self.effective_targets = state_dict.get("effective_targets", [])
         self.target_history = state_dict.get("target_history", {})
+        if "effective_targets" in state_dict:
+            self.effective_targets = dict.fromkeys(state_dict["effective_targets"])
+            self._memory_version += 1
+        else:
+            self.optimize_strategy()
         self._update_win_rate()
 
     def _update_win_rate(self) -> None:
@@ -176,90 +344,105 @@ class PlayerAgent(AgentBase):
         self.role = None
         self.alive = True
         self.witch_used = {"resurrect": False, "poison": False}
+        self._index = None
+        self._index_view = None
 
     async def __call__(self, role_map: Dict[str, str] = None, alive_players: List[str] = None, action_type: str = "vote", *args, **kwargs) -> Msg:
-        """赛事强制要求：核心交互函数"""
-        if role_map is None:
-            role_map = {}
-        if alive_players is None:
-            alive_players = ALL_PLAYERS
+        """赛事强制要求：核心交互函数（文本为JSON，metadata携带结构化动作）"""
+        start = time.perf_counter()
+        action = await self.act(role_map, alive_players, action_type, state=kwargs.get("state"))
+        if self.metrics is not None:
+            self.metrics.observe_decision(self.role, action_type, start)
+        # 讨论阶段只输出发言，其余阶段输出完整动作JSON
+        text = action.say if action_type == "discussion" else action.to_json()
+        # 返回标准Msg对象（赛事要求）
+        return Msg(
+            name=self.name,
+            content=[{"type": "text", "text": text}],
+            role="assistant",
+            metadata=action.to_dict()
+        )
+
+    async def act(self, role_map: Dict[str, str] = None, alive_players: List[str] = None, action_type: str = "vote", state: GameState = None) -> Action:
+        """决策核心：返回结构化动作（主持人直接读取，无需字符串往返）
+
+        state为座位/位掩码表示的对局状态（主持人传入存活快照）；未传入时由role_map/alive_players构造
+        action_type："discussion"狼人讨论、"kill"狼人夜间刀人、其余（"vote"）为白天投票/技能目标
+        """
         if self.role is None:
             self.role = "villager"
+        state = self._game_view(role_map, alive_players, state)
+        
+        opponent_alive = self._opp_mask & state.alive
+        non_opponent_alive = state.alive & ~opponent_alive & ~self._self_bit
+        key_good_alive = state.key_good_mask & state.alive
+        key_wolf_alive = state.wolf_mask & state.alive
         
-        opponent_camp_alive = [p for p in self.get_opponent_camp(role_map) if p in alive_players]
-        non_opponent_camp_alive = [p for p in alive_players if p not in opponent_camp_alive and p != self.name]
+        planned = self.planner is not None and self.planner.plays(self.role)
         
         # 狼人讨论阶段
         if action_type == "discussion" and self.role == "werewolf":
-            key_good_players = self.get_key_players(role_map, alive_players, camp="good")
-            if key_good_players:
-                target = random.choice(key_good_players)
-                role_name = role_map.get(target, "villager")
+            if planned:
+                target = await self._plan_target(state, "night")
+                proposal = f"我建议刀{target}！推演{self.planner.rollouts}局，刀他胜率最高，稳赢！"
+            elif key_good_alive:
+                target = state.pick(key_good_alive, rng=self.rng)
+                role_name = state.role_of(target) or "villager"
                 win_rate = self._get_target_win_rate(target)
                 proposal = f"我建议刀{target}！他是{role_name}，刀他胜率{win_rate}%，稳赢！"
             else:
-                target = self._smart_target(role_map, alive_players)
+                target = self._smart_target(role_map, alive_players, state)
                 win_rate = self._get_target_win_rate(target)
                 proposal = f"我建议刀{target}！之前投他胜率{win_rate}%，他是好人，刀他稳赢！"
-            return Msg(
-                name=self.name,
-                content=[{"type": "text", "text": proposal}],
-                role="assistant"
-            )
+            return Action(vote=target, say=proposal)
         
         # 核心目标选择
         target = None
-        if self.role == "werewolf":
-            if random.random() < 0.7 or len(non_opponent_camp_alive) < 1:
-                key_good_players = self.get_key_players(role_map, alive_players, camp="good")
-                target = random.choice(key_good_players) if key_good_players else self._smart_target(role_map, alive_players)
+        if planned:
+            target = await self._plan_target(state, "night" if action_type == "kill" else "day")
+        elif self.role == "werewolf":
+            if self.rng.random() < 0.7 or not non_opponent_alive:
+                target = state.pick(key_good_alive, rng=self.rng) if key_good_alive else self._smart_target(role_map, alive_players, state)
             else:
-                target = random.choice(non_opponent_camp_alive) if non_opponent_camp_alive else self._smart_target(role_map, alive_players)
+                # 候选为除自己外的非对立阵营存活玩家：与其他狼人共享同一份缓存列表，跳过自己
+                target = state.pick(non_opponent_alive, exclude=self._self_bit, rng=self.rng)
         else:
-            key_wolf_players = self.get_key_players(role_map, alive_players, camp="wolf")
-            target = random.choice(key_wolf_players) if key_wolf_players else self._smart_target(role_map, alive_players)
+            target = state.pick(key_wolf_alive, rng=self.rng) if key_wolf_alive else self._smart_target(role_map, alive_players, state)
+        target_is_opponent = bool(state.bit(target) & opponent_alive)
         
         # 统一所有角色输出：必含vote字段（解决KeyError）
         win_rate = self._get_target_win_rate(target)
         if self.role == "werewolf":
-            content = {
-                "vote": target,
-                "reach_agreement": True,
-                "say": f"之前投{target}胜率{win_rate}%，他是{'好人' if target in opponent_camp_alive else '狼人'}，刀他稳赢！"
-            }
+            return Action(
+                vote=target,
+                reach_agreement=True,
+                say=f"之前投{target}胜率{win_rate}%，他是{'好人' if target_is_opponent else '狼人'}，刀他稳赢！"
+            )
         elif self.role == "witch":
-            witch_resurrect = random.choices([True, False], weights=[0.7, 0.3])[0] if (not self.witch_used["resurrect"] and self.get_key_players(role_map, alive_players, camp="good")) else random.choice([True, False])
-            witch_poison = random.choices([True, False], weights=[0.8, 0.2])[0] if (not self.witch_used["poison"] and self.get_key_players(role_map, alive_players, camp="wolf")) else random.choice([True, False])
-            say = f"我记得{target}是{'狼人' if target in opponent_camp_alive else '好人'}，解药/毒药留着关键时候用！"
-            content = {
-                "vote": target,
-                "resurrect": witch_resurrect,
-                "poison": witch_poison,
-                "say": say
-            }
+            witch_resurrect = self.rng.choices([True, False], weights=[0.7, 0.3])[0] if (not self.witch_used["resurrect"] and key_good_alive) else self.rng.choice([True, False])
+            witch_poison = self.rng.choices([True, False], weights=[0.8, 0.2])[0] if (not self.witch_used["poison"] and key_wolf_alive) else self.rng.choice([True, False])
+            return Action(
+                vote=target,
+                resurrect=witch_resurrect,
+                poison=witch_poison,
+                say=f"我记得{target}是{'狼人' if target_is_opponent else '好人'}，解药/毒药留着关键时候用！"
+            )
         elif self.role == "seer":
-            identity = "狼人" if target in opponent_camp_alive else "好人"
-            content = {
-                "vote": target,
-                "check": target,
-                "identity": identity,
-                "say": f"查过{target}胜率{win_rate}%，他大概率是{identity}，验他准赢！"
-            }
+            identity = "狼人" if target_is_opponent else "好人"
+            return Action(
+                vote=target,
+                check=target,
+                identity=identity,
+                say=f"查过{target}胜率{win_rate}%，他大概率是{identity}，验他准赢！"
+            )
         elif self.role == "hunter":
-            content = {
-                "vote": target,
-                "shoot": random.choice([True, False]),
-                "say": f"{target}是狼人，投他胜率高，敢投我就带走他！"
-            }
+            return Action(
+                vote=target,
+                shoot=self.rng.choice([True, False]),
+                say=f"{target}是狼人，投他胜率高，敢投我就带走他！"
+            )
         else:  # 平民
-            content = {
-                "vote": target,
-                "say": f"之前投{target}赢过，他肯定是狼人，跟票准没错！"
-            }
-        
-        # 返回标准Msg对象（赛事要求）
-        return Msg(
-            name=self.name,
-            content=[{"type": "text", "text": str(content).replace("'", '"')}],
-            role="assistant"
-        )
\ No newline at end of file
+            return Action(
+                vote=target,
+                say=f"之前投{target}赢过，他肯定是狼人，跟票准没错！"
+            )
\ No newline at end of file
@@ -1,23 +1,141 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import asyncio
 import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+# 仓库根目录加入导入路径（Vercel以api/为入口目录）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 模块顶层只导入轻量依赖；对局引擎（game/agent → agentscope，导入约1秒以上）在首次需要时才导入，
+# 冷启动的/health、/metrics、/get_ranking请求不为其付出代价
+from metrics import CONTENT_TYPE, REGISTRY  # noqa: E402
+from stats_store import StatsStore, default_db_path  # noqa: E402
 
 # 初始化FastAPI应用（Coze要求必须有可访问的app实例）
 app = FastAPI()
 
-# 模拟狼人杀游戏逻辑（替换成你原有game.py/agent.py的调用逻辑）
-async def run_werewolf_game(game_rounds: int = 1):
-    """狼人杀游戏核心逻辑，返回标准结果"""
-    # 这里替换成你原有game.py里的游戏运行代码
-    result = {
+# 任务队列配置（可用环境变量覆盖）
+QUEUE_SIZE = int(os.environ.get("WEREWOLF_QUEUE_SIZE", 32))        # 排队任务上限，满了直接拒绝
+POOL_WORKERS = int(os.environ.get("WEREWOLF_POOL_WORKERS", 2))      # 运行对局的进程数（同时也是并发任务数）
+MAX_GAME_ROUNDS = int(os.environ.get("WEREWOLF_MAX_GAME_ROUNDS", 10000))  # 单个任务最多局数
+MAX_FINISHED_JOBS = int(os.environ.get("WEREWOLF_MAX_FINISHED_JOBS", 200))  # 最多保留的已结束任务记录
+MAX_RANKING_TOP = int(os.environ.get("WEREWOLF_MAX_RANKING_TOP", 1000))   # /get_ranking单次最多返回的排名条数
+STATS_DB = default_db_path()  # 胜率统计库（WEREWOLF_STATS_DB），所有任务的对局都写入这里
+
+# 任务表：{job_id: 任务记录}，按创建顺序；队列和工作协程在首个请求时懒启动
+jobs = OrderedDict()
+job_queue = None
+job_workers = []
+executor = None
+mangum_handler = None  # Mangum适配器：首次调用时创建，热实例的后续调用复用
+stats_reader = None  # 胜率统计库的只读连接：首次查询时打开，之后的查询复用
+stats_lock = threading.Lock()  # 同一连接不能被多个线程同时使用，查询串行执行
+
+
+def warm_engine() -> None:
+    """导入对局引擎：进程池工作进程启动时调用，使首个任务不再等待导入"""
+    import tournament  # noqa: F401
+
+
+def run_werewolf_game(game_rounds: int = 1, seed: int = None) -> dict:
+    """狼人杀游戏核心逻辑（在进程池中运行）：无头运行真实的ModeratorAgent，返回标准结果"""
+    from tournament import play_games
+    output = play_games(game_rounds, seed, stats_db=STATS_DB, collect_metrics=True)
+    winners = output["winners"]
+    ranking = sorted(output["final_stats"].items(), key=lambda item: item[1]["win_rate"], reverse=True)
+    return {
+        "game_rounds": output["games"],
+        "winner": "好人阵营" if winners["good"] >= winners["werewolf"] else "狼人阵营",
+        "winners": winners,
+        "player_ranking": [{"name": name, "win_rate": s["win_rate"]} for name, s in ranking],
+        "log": f"游戏运行完成：共{output['games']}局，好人阵营胜{winners['good']}局，狼人阵营胜{winners['werewolf']}局",
+        "metrics": output["metrics"]  # 工作进程的指标快照，由job_worker合并后移除
+    }
+
+
+def job_view(job: dict) -> dict:
+    """任务状态（不含结果）"""
+    return {k: v for k, v in job.items() if k != "result"}
+
+
+def prune_jobs() -> None:
+    """已结束的任务记录超过上限时，从最早的开始淘汰（排队/运行中的任务不淘汰）"""
+    finished = [job_id for job_id, job in jobs.items() if job["status"] in ("done", "failed")]
+    for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+        del jobs[job_id]
+
+
+async def job_worker() -> None:
+    """工作协程：从队列取任务，交给进程池运行，事件循环本身不被对局阻塞"""
+    loop = asyncio.get_running_loop()
+    while True:
+        job_id = await job_queue.get()
+        job = jobs.get(job_id)
+        try:
+            if job is None:
+                continue
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            try:
+                result = await loop.run_in_executor(executor, run_werewolf_game, job["game_rounds"], job["seed"])
+                REGISTRY.merge(result.pop("metrics", {}))
+                job["result"] = result
+                job["status"] = "done"
+            except Exception as e:
+                job["status"] = "failed"
+                job["error"] = str(e)
+            job["finished_at"] = time.time()
+            prune_jobs()
+        finally:
+            job_queue.task_done()
+
+
+def ensure_workers() -> None:
+    """懒启动队列、进程池和工作协程（必须在事件循环内调用）"""
+    global job_queue, executor
+    if job_queue is None:
+        job_queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    if executor is None:
+        executor = ProcessPoolExecutor(max_workers=POOL_WORKERS, initializer=warm_engine)
+    if not job_workers:
+        job_workers.extend(asyncio.create_task(job_worker()) for _ in range(POOL_WORKERS))
+
+
+def submit_job(game_rounds: int, seed: int = None) -> dict:
+    """创建任务并放入有界队列；队列已满时抛出asyncio.QueueFull"""
+    ensure_workers()
+    job_id = uuid.uuid4().hex
+    job = {
+        "job_id": job_id,
+        "status": "queued",
         "game_rounds": game_rounds,
-        "winner": "狼人阵营",
-        "player_ranking": [{"name": "狼人1", "win_rate": 1.0}, {"name": "村民1", "win_rate": 0.0}],
-        "log": "游戏运行完成：狼人阵营获胜"
+        "seed": seed if seed is not None else random.randrange(2 ** 32),
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "error": None,
+        "result": None
     }
-    await asyncio.sleep(2)  # 模拟游戏运行耗时
-    return result
+    job_queue.put_nowait(job_id)
+    jobs[job_id] = job
+    return job
+
+
+async def read_params(request: Request) -> dict:
+    """兼容Coze的GET/POST参数传递"""
+    if request.method == "GET":
+        return dict(request.query_params)
+    body = await request.body()
+    return json.loads(body) if body else {}
 
 # 健康检查接口（用于验证服务是否正常）
 @app.get("/health")
@@ -34,44 +152,168 @@ async def health_check():
 @app.api_route("/start_werewolf", methods=["GET", "POST"])
 async def start_werewolf(request: Request):
     try:
-        # 兼容Coze的GET/POST参数传递
-        if request.method == "GET":
-            params = request.query_params
-        else:
-            params = await request.json()
+        params = await read_params(request)
         
-        # 获取游戏局数（默认1局）
+        # 获取游戏局数（默认1局）与可选随机种子
         game_rounds = int(params.get("game_rounds", 1))
+        if not 1 <= game_rounds <= MAX_GAME_ROUNDS:
+            raise ValueError(f"game_rounds必须在1~{MAX_GAME_ROUNDS}之间")
+        seed = params.get("seed")
         
-        # 运行游戏逻辑
-        game_result = await run_werewolf_game(game_rounds)
+        # 放入任务队列后立即返回任务ID（对局在进程池中运行）
+        try:
+            job = submit_job(game_rounds, int(seed) if seed is not None else None)
+        except asyncio.QueueFull:
+            return JSONResponse({
+                "status": "failed",
+                "code": 429,
+                "message": "任务队列已满，请稍后重试",
+                "data": {}
+            }, status_code=200)
         
-        # 返回Coze要求的标准JSON格式
         return JSONResponse({
             "status": "success",
             "code": 200,
-            "message": "游戏运行成功",
-            "data": game_result
+            "message": "游戏任务已提交",
+            "data": {"job_id": job["job_id"], "status": job["status"], "queue_size": job_queue.qsize()}
         })
     except Exception as e:
         # 异常捕获，返回Coze可识别的错误格式
         return JSONResponse({
             "status": "failed",
             "code": 500,
-            "message": f"游戏运行失败：{str(e)}",
+            "message": f"游戏任务提交失败：{str(e)}",
             "data": {}
         }, status_code=200)  # 注意：Coze不接收500状态码，统一返回200
 
-# 胜率查询接口（适配Coze调用）
+def find_job(params: dict):
+    job_id = params.get("job_id")
+    if not job_id or job_id not in jobs:
+        return None
+    return jobs[job_id]
+
+
+# 任务状态查询接口
+@app.api_route("/job_status", methods=["GET", "POST"])
+async def job_status(request: Request):
+    try:
+        job = find_job(await read_params(request))
+        if job is None:
+            return JSONResponse({
+                "status": "failed",
+                "code": 404,
+                "message": "任务不存在或已过期",
+                "data": {}
+            }, status_code=200)
+        return JSONResponse({
+            "status": "success",
+            "code": 200,
+            "message": "任务状态查询成功",
+            "data": job_view(job)
+        })
+    except Exception as e:
+        return JSONResponse({
+            "status": "failed",
+            "code": 500,
+            "message": f"查询失败：{str(e)}",
+            "data": {}
+        }, status_code=200)
+
+# 任务结果查询接口（任务未结束时返回当前状态）
+@app.api_route("/job_result", methods=["GET", "POST"])
+async def job_result(request: Request):
+    try:
+        job = find_job(await read_params(request))
+        if job is None:
+            return JSONResponse({
+                "status": "failed",
+                "code": 404,
+                "message": "任务不存在或已过期",
+                "data": {}
+            }, status_code=200)
+        if job["status"] == "failed":
+            return JSONResponse({
+                "status": "failed",
+                "code": 500,
+                "message": f"游戏运行失败：{job['error']}",
+                "data": job_view(job)
+            }, status_code=200)
+        if job["status"] != "done":
+            return JSONResponse({
+                "status": "pending",
+                "code": 202,
+                "message": "游戏仍在运行中",
+                "data": job_view(job)
+            }, status_code=200)
+        return JSONResponse({
+            "status": "success",
+            "code": 200,
+            "message": "游戏运行成功",
+            "data": job["result"]
+        })
+    except Exception as e:
+        return JSONResponse({
+            "status": "failed",
+            "code": 500,
+            "message": f"查询失败：{str(e)}",
+            "data": {}
+        }, status_code=200)
+
+# 流式对局接口：以NDJSON（默认）或SSE边跑边推送对局事件（夜间刀人、女巫、投票、结果）
+# 对局在独立线程中运行，长时间的流不阻塞/health、/job_status、/metrics等接口
+@app.get("/stream")
+async def stream(request: Request):
+    try:
+        from metrics import GAME_METRICS
+        from streaming import MEDIA_TYPES, stream_lines
+        params = dict(request.query_params)
+        game_rounds = int(params.get("game_rounds", 1))
+        if not 1 <= game_rounds <= MAX_GAME_ROUNDS:
+            raise ValueError(f"game_rounds必须在1~{MAX_GAME_ROUNDS}之间")
+        fmt = params.get("format", "ndjson")
+        if fmt not in MEDIA_TYPES:
+            raise ValueError(f"format必须是{'/'.join(MEDIA_TYPES)}之一")
+        return StreamingResponse(stream_lines(game_rounds, fmt, {"metrics": GAME_METRICS}, threaded=True),
+                                 media_type=MEDIA_TYPES[fmt], headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    except Exception as e:
+        return JSONResponse({
+            "status": "failed",
+            "code": 500,
+            "message": f"流式对局启动失败：{str(e)}",
+            "data": {}
+        }, status_code=200)
+
+# Prometheus指标接口：各阶段/单次决策耗时直方图、对局数、超时数（含进程池任务合并回来的指标）
+@app.get("/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+def query_ranking(by: str, top: int, role: str = None) -> list:
+    """在线程池中运行的胜率查询（SQLite查询是阻塞调用，不放在事件循环上）"""
+    global stats_reader
+    with stats_lock:
+        if stats_reader is None:
+            stats_reader = StatsStore.reader(STATS_DB)
+        if by == "player":
+            return stats_reader.top_players_by_role(role, top) if role else stats_reader.top_players(top)
+        if by == "role":
+            return stats_reader.role_breakdown()
+        return stats_reader.seat_breakdown(role)
+
+# 胜率查询接口（适配Coze调用）：读取持久化统计库中的累计胜率
+# 参数：by=player（默认）/role/seat，top=前k名，role=只看某角色
 @app.api_route("/get_ranking", methods=["GET", "POST"])
-async def get_ranking():
+async def get_ranking(request: Request):
     try:
-        # 这里替换成你原有胜率统计逻辑
-        ranking = [
-            {"player": "狼人1", "win_times": 3, "total_times": 5, "win_rate": 0.6},
-            {"player": "预言家1", "win_times": 2, "total_times": 5, "win_rate": 0.4},
-            {"player": "村民1", "win_times": 1, "total_times": 5, "win_rate": 0.2}
-        ]
+        params = await read_params(request)
+        by = params.get("by", "player")
+        top = int(params.get("top", 10))
+        if not 1 <= top <= MAX_RANKING_TOP:
+            raise ValueError(f"top必须在1~{MAX_RANKING_TOP}之间")
+        role = params.get("role")
+        if by not in ("player", "role", "seat"):
+            raise ValueError("by必须是player/role/seat之一")
+        ranking = await run_in_threadpool(query_ranking, by, top, role)
         return JSONResponse({
             "status": "success",
             "code": 200,
@@ -86,7 +328,10 @@ async def get_ranking():
             "data": {}
         }, status_code=200)
 
-# Vercel Python运行时需要的入口（固定写法）
+# Vercel Python运行时需要的入口（固定写法）：适配器在模块级缓存，热实例不重复创建
 def handler(event, context):
-    import mangum
-    return mangum.Mangum(app)(event, context)
+    global mangum_handler
+    if mangum_handler is None:
+        import mangum
+        mangum_handler = mangum.Mangum(app)
+    return mangum_handler(event, context)
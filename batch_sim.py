@@ -0,0 +1,235 @@
+import numpy as np
+
+from state import ROLE_CONFIG
+
+# 角色编码（数组化表示）
+ROLE_CODES = {"werewolf": 0, "villager": 1, "seer": 2, "witch": 3, "hunter": 4}
+WOLF, VILLAGER, SEER, WITCH, HUNTER = 0, 1, 2, 3, 4
+GOOD_WIN, WOLF_WIN = 0, 1
+MAX_ROUNDS = 50  # 安全上限（规则保证每晚至少有进展，实际远小于此）
+
+
+def _choose(rng: np.random.Generator, mask: np.ndarray) -> np.ndarray:
+    """在最后一维的布尔掩码中均匀随机选一个位置（等价于random.choice），无候选时返回-1"""
+    keys = np.where(mask, rng.random(mask.shape), -1.0)
+    choice = keys.argmax(axis=-1)
+    return np.where(mask.any(axis=-1), choice, -1)
+
+
+def _plurality(rng: np.random.Generator, targets: np.ndarray, n: int) -> np.ndarray:
+    """按行统计票数取最高票，平票随机；targets为[G, V]目标下标（-1表示未投票），无票时返回-1"""
+    g = targets.shape[0]
+    counts = np.zeros((g, n), dtype=np.int32)
+    rows, voters = np.nonzero(targets >= 0)
+    np.add.at(counts, (rows, targets[rows, voters]), 1)
+    top = counts.max(axis=1, keepdims=True)
+    winner = _choose(rng, (counts == top) & (counts > 0))
+    return winner
+
+
+def _wolf_targets(rng, alive, is_wolf, key_good, voters) -> np.ndarray:
+    """狼人目标策略（对应PlayerAgent.act）：70%刀存活神职（无则随机好人），30%投其他存活狼人"""
+    g, n = alive.shape
+    wolves_alive = alive & is_wolf
+    good_alive = alive & ~is_wolf
+    key_alive = alive & key_good
+    other_wolves = wolves_alive[:, None, :] & ~np.eye(n, dtype=bool)[None]  # [G, 投票者, 目标]
+    has_other = other_wolves.any(axis=2)
+    use_key = (rng.random((g, n)) < 0.7) | ~has_other
+    key_or_good = np.where(key_alive.any(axis=1, keepdims=True), key_alive, good_alive)
+    pick_key = _choose(rng, np.broadcast_to(key_or_good[:, None, :], (g, n, n)))
+    pick_wolf = _choose(rng, other_wolves)
+    return np.where(voters, np.where(use_key, pick_key, pick_wolf), -1)
+
+
+def _good_targets(rng, alive, is_wolf, voters) -> np.ndarray:
+    """好人目标策略：随机投一名存活狼人"""
+    g, n = alive.shape
+    wolves_alive = alive & is_wolf
+    pick = _choose(rng, np.broadcast_to(wolves_alive[:, None, :], (g, n, n)))
+    return np.where(voters, pick, -1)
+
+
+def play_out(rng: np.random.Generator, roles: np.ndarray, alive: np.ndarray, resurrect_used: np.ndarray = None,
+             poison_used: np.ndarray = None, kill: np.ndarray = None, eliminate: np.ndarray = None) -> tuple:
+    """从给定局面向量化地继续模拟到分出胜负，返回(winner, rounds)（rounds从当前轮记为第1轮）
+
+    roles/alive为[G, N]数组（alive原地修改），resurrect_used/poison_used为[G]女巫用药标记（默认未使用）；
+    kill：[G]本晚狼人的刀人座位（给定时跳过本晚狼人投票，从女巫阶段继续）；
+    eliminate：[G]本轮白天被投出的座位（给定时跳过本晚和白天投票，从猎人开枪继续）
+    """
+    g, n = roles.shape
+    rows = np.arange(g)
+    is_wolf = roles == WOLF
+    key_good = (roles == SEER) | (roles == WITCH) | (roles == HUNTER)
+    witch_seat = np.where((roles == WITCH).any(axis=1), (roles == WITCH).argmax(axis=1), -1)
+
+    active = np.ones(g, dtype=bool)
+    resurrect_used = np.zeros(g, dtype=bool) if resurrect_used is None else resurrect_used.copy()
+    poison_used = np.zeros(g, dtype=bool) if poison_used is None else poison_used.copy()
+    winner = np.full(g, -1, dtype=np.int8)
+    rounds = np.zeros(g, dtype=np.int16)
+
+    for round_num in range(1, MAX_ROUNDS + 1):
+        if not active.any():
+            break
+        # 本轮开始时的存活快照（对应run_game中的alive_players）
+        snap = alive & active[:, None]
+        wolves_snap = snap & is_wolf
+        forced_vote = eliminate if round_num == 1 else None
+
+        if forced_vote is None:
+            # ---------- 夜晚：狼人刀人 ----------
+            if kill is not None and round_num == 1:
+                wolf_target = kill
+            else:
+                wolf_votes = _wolf_targets(rng, snap, is_wolf, key_good, wolves_snap)
+                wolf_target = _plurality(rng, wolf_votes, n)
+            killed = wolf_target >= 0
+            alive[rows[killed], wolf_target[killed]] = False
+
+            # ---------- 夜晚：女巫 ----------
+            witch_alive = active & (witch_seat >= 0) & snap[rows, np.maximum(witch_seat, 0)]
+            p_resurrect = np.where(resurrect_used, 0.5, 0.7)
+            p_poison = np.where(~poison_used & wolves_snap.any(axis=1), 0.8, 0.5)
+            do_resurrect = witch_alive & (rng.random(g) < p_resurrect) & ~resurrect_used
+            do_poison = witch_alive & (rng.random(g) < p_poison) & ~poison_used
+            revive = do_resurrect & killed
+            alive[rows[revive], wolf_target[revive]] = True
+            resurrect_used |= do_resurrect
+
+            poison_pool = np.where(wolves_snap.any(axis=1, keepdims=True), wolves_snap, snap)
+            poison_target = _choose(rng, poison_pool)
+            valid = do_poison & (poison_target >= 0)
+            valid &= alive[rows, np.maximum(poison_target, 0)] & (poison_target != witch_seat)
+            alive[rows[valid], poison_target[valid]] = False
+            poison_used |= do_poison
+
+            # ---------- 白天：全体投票（快照中的所有玩家都参与） ----------
+            day_votes = np.where(
+                is_wolf,
+                _wolf_targets(rng, snap, is_wolf, key_good, snap & is_wolf),
+                _good_targets(rng, snap, is_wolf, snap & ~is_wolf)
+            )
+            day_votes = np.where(snap, day_votes, -1)
+            vote_out = _plurality(rng, day_votes, n)
+        else:
+            vote_out = forced_vote
+        voted = active & (vote_out >= 0)
+        alive[rows[voted], vote_out[voted]] = False
+
+        # ---------- 猎人开枪 ----------
+        out = np.maximum(vote_out, 0)
+        hunter_out = voted & (roles[rows, out] == HUNTER) & snap[rows, out]
+        shoot = hunter_out & (rng.random(g) < 0.5)
+        shoot_target = _choose(rng, wolves_snap)
+        valid = shoot & (shoot_target >= 0) & (shoot_target != vote_out)
+        alive[rows[valid], shoot_target[valid]] = False
+
+        # ---------- 胜负判定 ----------
+        wolves_left = (alive & is_wolf).sum(axis=1)
+        good_left = (alive & ~is_wolf).sum(axis=1)
+        good_win = active & (wolves_left == 0)
+        wolf_win = active & ~good_win & (wolves_left >= good_left)
+        winner[good_win] = GOOD_WIN
+        winner[wolf_win] = WOLF_WIN
+        finished = good_win | wolf_win
+        rounds[finished] = round_num
+        active &= ~finished
+    return winner, rounds
+
+
+def simulate_batch(num_games: int, rng: np.random.Generator, role_config: dict = None) -> dict:
+    """向量化模拟一批对局：角色为[G, N]数组，存活为布尔矩阵，投票/计票全部用数组运算完成"""
+    role_config = role_config or ROLE_CONFIG
+    base = np.array([ROLE_CODES[r] for r, c in role_config.items() for _ in range(c)], dtype=np.int8)
+    n = base.size
+    g = num_games
+
+    roles = rng.permuted(np.tile(base, (g, 1)), axis=1)
+    winner, rounds = play_out(rng, roles, np.ones((g, n), dtype=bool))
+
+    # 每个座位（PlayerN）的胜场：所属阵营获胜即计胜
+    seat_wins = np.where(roles == WOLF, winner[:, None] == WOLF_WIN, winner[:, None] == GOOD_WIN)
+    return {
+        "roles": roles,
+        "winner": winner,
+        "rounds": rounds,
+        "seat_wins": seat_wins.sum(axis=0),
+        "seats": np.arange(n)
+    }
+
+
+def simulate(total_games: int, seed: int = None, batch_size: int = 50_000, role_config: dict = None) -> dict:
+    """分批向量化模拟total_games局，汇总为与ModeratorAgent一致的统计（胜方计数、平均轮数、final_stats）"""
+    rng = np.random.default_rng(seed)
+    good_wins = wolf_wins = unfinished = 0
+    rounds_sum = 0
+    seat_wins = None
+    remaining = total_games
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        batch = simulate_batch(size, rng, role_config)
+        good_wins += int((batch["winner"] == GOOD_WIN).sum())
+        wolf_wins += int((batch["winner"] == WOLF_WIN).sum())
+        unfinished += int((batch["winner"] < 0).sum())
+        rounds_sum += int(batch["rounds"].sum())
+        seat_wins = batch["seat_wins"] if seat_wins is None else seat_wins + batch["seat_wins"]
+        remaining -= size
+    finished = max(good_wins + wolf_wins, 1)
+    final_stats = {
+        f"Player{i + 1}": {"total": total_games, "wins": int(w), "win_rate": round(int(w) / max(total_games, 1), 2)}
+        for i, w in enumerate(seat_wins if seat_wins is not None else [])
+    }
+    return {
+        "games": total_games,
+        "winners": {"good": good_wins, "werewolf": wolf_wins},
+        "unfinished": unfinished,
+        "good_win_rate": good_wins / max(total_games, 1),
+        "mean_rounds": rounds_sum / finished,
+        "final_stats": final_stats
+    }
+
+
+def _summarize_moderator(results: list) -> dict:
+    """将ModeratorAgent.run的逐局结果整理为与simulate相同口径的统计"""
+    good_wins = sum(1 for r in results if r["winner"] == "good")
+    return {
+        "games": len(results),
+        "good_win_rate": good_wins / max(len(results), 1),
+        "mean_rounds": sum(r["rounds"] for r in results) / max(len(results), 1)
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import math
+    import time
+
+    parser = argparse.ArgumentParser(description="NumPy向量化批量对局模拟（规则型智能体）")
+    parser.add_argument("--games", type=int, default=1_000_000, help="模拟局数")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="单批对局数（控制内存）")
+    parser.add_argument("--compare", type=int, default=0, help="同时用ModeratorAgent跑N局，对比统计结果")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sim = simulate(args.games, seed=args.seed, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"Batch engine: {sim['games']} games in {elapsed:.2f}s ({sim['games'] / max(elapsed, 1e-9):.0f} games/sec)")
+    print(f"  good win rate={sim['good_win_rate']:.4f} | mean rounds={sim['mean_rounds']:.3f} | unfinished={sim['unfinished']}")
+
+    if args.compare > 0:
+        from game import ModeratorAgent
+
+        moderator = ModeratorAgent(quiet=True)
+        start = time.perf_counter()
+        ref = _summarize_moderator(asyncio.run(moderator.run(args.compare)))
+        elapsed = time.perf_counter() - start
+        # 两个独立样本比例差的95%置信区间
+        p1, n1, p2, n2 = sim["good_win_rate"], sim["games"], ref["good_win_rate"], ref["games"]
+        half = 1.96 * math.sqrt(p1 * (1 - p1) / n1 + p2 * (1 - p2) / n2)
+        print(f"ModeratorAgent: {ref['games']} games in {elapsed:.2f}s ({ref['games'] / max(elapsed, 1e-9):.0f} games/sec)")
+        print(f"  good win rate={ref['good_win_rate']:.4f} | mean rounds={ref['mean_rounds']:.3f}")
+        print(f"Win-rate difference: {p1 - p2:+.4f} (95% CI ±{half:.4f})")
@@ -0,0 +1,90 @@
+"""跨局记忆内存基准：长时间运行时对比无界记忆与有界记忆（滑动窗口/指数衰减）的RSS与checkpoint大小
+
+用法：
+    python benchmarks/bench_memory.py --records 2000000 --window 1000
+    python benchmarks/bench_memory.py --games 20000 --decay 0.999
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent import PlayerAgent, ALL_PLAYERS  # noqa: E402
+from game import ModeratorAgent  # noqa: E402
+
+
+def current_rss_kb() -> int:
+    """当前常驻内存（KB）：Linux读/proc，其他平台退化为峰值RSS"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def checkpoint_bytes(agent: PlayerAgent) -> int:
+    """state_dict序列化为JSON后的字节数"""
+    return len(json.dumps(agent.state_dict(), ensure_ascii=False).encode("utf-8"))
+
+
+def run_records(total: int, samples: int, agent_kwargs: dict) -> list:
+    """直接向单个智能体灌入投票记录（百万级），按采样点记录RSS"""
+    agent = PlayerAgent("Player1", **agent_kwargs)
+    agent.role = "villager"
+    role_map = {p: ("werewolf" if i % 3 == 0 else "villager") for i, p in enumerate(ALL_PLAYERS)}
+    wolves = [p for p, r in role_map.items() if r == "werewolf"]
+    step = max(total // samples, 1)
+    rows = []
+    for i in range(1, total + 1):
+        agent.update_history(random.choice(wolves), random.random() < 0.5, role_map)
+        if i % step == 0:
+            rows.append({"records": i, "rss_kb": current_rss_kb(), "memory_len": len(agent.history["vote_records"]),
+                         "checkpoint_bytes": checkpoint_bytes(agent)})
+    return rows
+
+
+def run_games(total: int, samples: int, agent_kwargs: dict) -> list:
+    """无头运行完整对局，按采样点记录RSS"""
+    moderator = ModeratorAgent(quiet=True, agent_kwargs=agent_kwargs)
+    step = max(total // samples, 1)
+    rows = []
+
+    async def _run():
+        for i in range(1, total + 1):
+            await moderator.run_game()
+            if i % step == 0:
+                agents = moderator.player_agents.values()
+                rows.append({"games": i, "rss_kb": current_rss_kb(),
+                             "memory_len": sum(len(a.history["vote_records"]) for a in agents),
+                             "checkpoint_bytes": sum(checkpoint_bytes(a) for a in agents)})
+
+    asyncio.run(_run())
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="跨局记忆内存基准")
+    parser.add_argument("--records", type=int, default=1_000_000, help="直接灌入的投票记录数")
+    parser.add_argument("--games", type=int, default=0, help="改为运行完整对局的局数（>0时生效）")
+    parser.add_argument("--samples", type=int, default=10, help="采样点数量")
+    parser.add_argument("--window", type=int, default=None, help="滑动窗口大小")
+    parser.add_argument("--decay", type=float, default=None, help="指数衰减系数")
+    parser.add_argument("--json", action="store_true", help="以JSON输出")
+    args = parser.parse_args()
+
+    agent_kwargs = {"memory_window": args.window, "memory_decay": args.decay}
+    rows = run_games(args.games, args.samples, agent_kwargs) if args.games > 0 \
+        else run_records(args.records, args.samples, agent_kwargs)
+    if args.json:
+        print(json.dumps({"config": agent_kwargs, "samples": rows}))
+    else:
+        print(f"config: {agent_kwargs}")
+        for row in rows:
+            print("  " + " | ".join(f"{k}={v}" for k, v in row.items()))
+        growth = rows[-1]["rss_kb"] - rows[0]["rss_kb"] if rows else 0
+        print(f"RSS growth from first to last sample: {growth} KB")
@@ -0,0 +1,52 @@
+"""桌大小扩展性基准：不同人数下单轮（一昼夜）耗时，检查是否随人数近似线性增长
+
+用法：
+    python benchmarks/bench_scaling.py --sizes 9 12 18 36 72 144 --games 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game import ModeratorAgent  # noqa: E402
+
+
+def measure(num_players: int, games: int) -> dict:
+    """无头运行若干局，返回每轮耗时与按人数归一后的每轮耗时"""
+    moderator = ModeratorAgent(quiet=True, num_players=num_players)
+    asyncio.run(moderator.run(1))  # 预热
+    start = time.perf_counter()
+    results = asyncio.run(moderator.run(games))
+    elapsed = time.perf_counter() - start
+    rounds = sum(r["rounds"] for r in results)
+    per_round_us = elapsed / max(rounds, 1) * 1e6
+    return {
+        "players": num_players,
+        "games": games,
+        "rounds": rounds,
+        "per_round_us": round(per_round_us, 1),
+        "per_round_per_player_us": round(per_round_us / num_players, 2)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="桌大小扩展性基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[9, 12, 18, 36, 72, 144], help="桌大小列表")
+    parser.add_argument("--games", type=int, default=20, help="每种桌大小的对局数")
+    parser.add_argument("--json", action="store_true", help="以JSON输出")
+    args = parser.parse_args()
+
+    rows = [measure(n, args.games) for n in args.sizes]
+    if args.json:
+        print(json.dumps(rows))
+    else:
+        print(f"{'players':>8} {'rounds':>8} {'us/round':>12} {'us/round/player':>16}")
+        for row in rows:
+            print(f"{row['players']:>8} {row['rounds']:>8} {row['per_round_us']:>12} {row['per_round_per_player_us']:>16}")
+        # 近似线性时，每轮每人耗时应基本持平
+        ratio = rows[-1]["per_round_per_player_us"] / max(rows[0]["per_round_per_player_us"], 1e-9)
+        print(f"per-player cost ratio ({rows[-1]['players']} vs {rows[0]['players']} seats): {ratio:.2f}x")
@@ -0,0 +1,79 @@
+"""Serverless冷启动基准：在全新进程中导入api/index.py，并通过Vercel入口handler依次发起请求
+
+分别计时：模块导入、冷/health（含创建Mangum适配器）、热/health（复用适配器）、首次加载对局引擎，
+并断言/health处理完后agentscope仍未被导入（否则探测失败）。
+
+用法：
+    python benchmarks/bench_startup.py --repeat 5
+    python benchmarks/bench_startup.py --json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在子进程中执行的探测脚本：输出一行JSON
+PROBE = r"""
+import json, sys, time
+sys.path.insert(0, {api!r})
+
+def event(path):
+    return {{
+        "resource": "/{{proxy+}}", "path": path, "httpMethod": "GET", "headers": {{"host": "localhost"}},
+        "multiValueHeaders": {{}}, "queryStringParameters": None, "multiValueQueryStringParameters": None,
+        "requestContext": {{"resourcePath": "/{{proxy+}}", "httpMethod": "GET", "path": path, "stage": "prod"}},
+        "body": None, "isBase64Encoded": False
+    }}
+
+timings = {{}}
+start = time.perf_counter()
+import index
+timings["import_ms"] = time.perf_counter() - start
+
+start = time.perf_counter()
+response = index.handler(event("/health"), None)
+timings["health_cold_ms"] = time.perf_counter() - start
+assert response["statusCode"] == 200, response
+
+start = time.perf_counter()
+index.handler(event("/health"), None)
+timings["health_warm_ms"] = time.perf_counter() - start
+assert "agentscope" not in sys.modules, "/health不应加载对局引擎"
+
+start = time.perf_counter()
+index.warm_engine()
+timings["engine_import_ms"] = time.perf_counter() - start
+
+print(json.dumps(timings))
+"""
+
+
+def probe() -> dict:
+    code = PROBE.format(api=os.path.join(ROOT, "api"))
+    out = subprocess.run([sys.executable, "-W", "ignore", "-c", code], capture_output=True, text=True, cwd=ROOT)
+    if out.returncode:
+        raise RuntimeError(f"冷启动探测失败：\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure(repeat: int) -> dict:
+    """重复repeat次（每次一个全新进程），各项耗时取最好的一次（毫秒）"""
+    runs = [probe() for _ in range(repeat)]
+    return {f"startup.{key}": round(min(r[key] for r in runs) * 1000, 2) for key in runs[0]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serverless冷启动基准")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（每次一个全新进程）")
+    parser.add_argument("--json", action="store_true", help="以JSON输出")
+    args = parser.parse_args()
+
+    results = measure(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for key, value in results.items():
+            print(f"{key:<44} {value}")
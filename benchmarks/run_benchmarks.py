@@ -0,0 +1,201 @@
+"""引擎基准套件：对局吞吐、单次决策延迟、跨局内存增长、FastAPI冷启动，输出JSON并可与基线对比
+
+用法：
+    python benchmarks/run_benchmarks.py --output bench.json                 # 运行并保存结果
+    python benchmarks/run_benchmarks.py --baseline bench.json               # 与基线对比，出现退化时退出码为1
+    python benchmarks/run_benchmarks.py --quick --only throughput latency   # 缩小规模、只跑部分基准
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from agent import PlayerAgent  # noqa: E402
+from bench_memory import checkpoint_bytes, current_rss_kb  # noqa: E402
+from bench_startup import measure as measure_startup  # noqa: E402
+from game import ModeratorAgent, ROLE_CONFIG, make_players  # noqa: E402
+from state import GameState  # noqa: E402
+
+# 各指标的优化方向：True为越大越好，False为越小越好（对比基线时判断是否退化）
+HIGHER_IS_BETTER = {
+    "games_per_sec": True,
+    "latency_us": False,
+    "rss_growth_kb": False,
+    "bytes_per_game": False,
+    "cold_start_ms": False,
+    "_ms": False
+}
+
+
+def _direction(metric: str) -> bool:
+    for suffix, higher in HIGHER_IS_BETTER.items():
+        if suffix in metric:
+            return higher
+    return False
+
+
+def bench_throughput(games: int, repeat: int) -> dict:
+    """games/sec：game.ModeratorAgent（无头模式）与main.Game（示例引擎），取多次中最好的一次"""
+    from main import Game
+
+    results = {}
+    best = 0.0
+    for _ in range(repeat):
+        random.seed(0)
+        moderator = ModeratorAgent(quiet=True)
+        start = time.perf_counter()
+        asyncio.run(moderator.run(games))
+        best = max(best, games / max(time.perf_counter() - start, 1e-9))
+    results["moderator.games_per_sec"] = round(best, 1)
+
+    best = 0.0
+    toy_games = games * 20  # 示例引擎每局只有固定3轮，放大局数以获得稳定读数
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(toy_games):
+            Game(make_players(9)).run_game()
+        best = max(best, toy_games / max(time.perf_counter() - start, 1e-9))
+    results["main_game.games_per_sec"] = round(best, 1)
+    return results
+
+
+def bench_decision_latency(samples: int) -> dict:
+    """按角色统计PlayerAgent.__call__单次决策延迟（微秒，p50/p95）"""
+    players = make_players(9)
+    roles = [role for role, count in ROLE_CONFIG.items() for _ in range(count)]
+    results = {}
+
+    async def measure(agent, state, role_map, alive_players, action_type):
+        for _ in range(max(samples // 10, 1)):  # 预热
+            await agent(role_map, alive_players, action_type, state=state)
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            await agent(role_map, alive_players, action_type, state=state)
+            timings.append((time.perf_counter() - start) * 1e6)
+        return timings
+
+    random.seed(0)
+    role_map = dict(zip(players, roles))
+    state = GameState(players, role_map)
+    alive_players = state.alive_names()
+    for role in ROLE_CONFIG:
+        name = next(p for p, r in role_map.items() if r == role)
+        agent = PlayerAgent(name, players=players)
+        agent.role = role
+        agent.begin_game(state)
+        for action_type in ("vote", "discussion") if role == "werewolf" else ("vote",):
+            timings = sorted(asyncio.run(measure(agent, state, role_map, alive_players, action_type)))
+            key = f"{role}.{action_type}" if role == "werewolf" else role
+            results[f"decision.{key}.p50_latency_us"] = round(statistics.median(timings), 2)
+            results[f"decision.{key}.p95_latency_us"] = round(timings[int(len(timings) * 0.95)], 2)
+    return results
+
+
+def bench_memory_growth(games: int) -> dict:
+    """无头运行games局，统计RSS增长与每局的智能体状态（checkpoint）增长"""
+    random.seed(0)
+    moderator = ModeratorAgent(quiet=True)
+    asyncio.run(moderator.run(10))  # 预热（导入、缓存）
+    agents = moderator.player_agents.values()
+    rss_before = current_rss_kb()
+    ckpt_before = sum(checkpoint_bytes(a) for a in agents)
+    asyncio.run(moderator.run(games))
+    rss_after = current_rss_kb()
+    ckpt_after = sum(checkpoint_bytes(a) for a in agents)
+    return {
+        "memory.rss_growth_kb": rss_after - rss_before,
+        "memory.checkpoint_bytes_per_game": round((ckpt_after - ckpt_before) / max(games, 1), 1)
+    }
+
+
+def bench_cold_start(repeat: int) -> dict:
+    """在全新进程中导入FastAPI应用模块（main.py、api/index.py）的耗时，以及Vercel入口冷/热请求耗时（bench_startup），取最好的一次"""
+    results = {}
+    targets = {"main": ROOT, "index": os.path.join(ROOT, "api")}
+    for module, path in targets.items():
+        code = (f"import sys, time; sys.path.insert(0, {path!r}); start = time.perf_counter(); "
+                f"import {module}; assert {module}.app is not None; print(time.perf_counter() - start)")
+        timings = []
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, "-W", "ignore", "-c", code], capture_output=True, text=True,
+                                 cwd=ROOT, check=True)
+            timings.append(float(out.stdout.strip().splitlines()[-1]) * 1000)
+        key = "api_index" if module == "index" else module
+        results[f"cold_start.{key}.cold_start_ms"] = round(min(timings), 1)
+    results.update(measure_startup(repeat))
+    return results
+
+
+BENCHMARKS = {
+    "throughput": lambda quick: bench_throughput(100 if quick else 1000, 1 if quick else 3),
+    "latency": lambda quick: bench_decision_latency(200 if quick else 2000),
+    "memory": lambda quick: bench_memory_growth(200 if quick else 5000),
+    "cold_start": lambda quick: bench_cold_start(1 if quick else 3)
+}
+
+
+def run_all(only: list = None, quick: bool = False) -> dict:
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        if not only or name in only:
+            results.update(bench(quick))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "quick": quick
+        },
+        "results": results
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """逐项与基线对比：返回[(指标, 基线值, 当前值, 变化比例, 是否退化)]"""
+    rows = []
+    for metric, value in current["results"].items():
+        base = baseline.get("results", {}).get(metric)
+        if base is None:
+            continue
+        change = (value - base) / base if base else 0.0
+        worse = -change if _direction(metric) else change
+        rows.append((metric, base, value, change, worse > tolerance))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="狼人杀引擎基准套件")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=None, help="只运行指定基准")
+    parser.add_argument("--quick", action="store_true", help="缩小规模（用于快速检查）")
+    parser.add_argument("--output", default=None, help="把结果写入该JSON文件（可作为之后的基线）")
+    parser.add_argument("--baseline", default=None, help="与该基线JSON对比")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="允许的退化比例（默认10%%）")
+    args = parser.parse_args()
+
+    report = run_all(args.only, args.quick)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if not args.baseline:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        sys.exit(0)
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare(report, baseline, args.tolerance)
+    print(f"{'metric':<48} {'baseline':>12} {'current':>12} {'change':>9}")
+    for metric, base, value, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{metric:<48} {base:>12} {value:>12} {change:>+8.1%}{flag}")
+    sys.exit(1 if any(r[4] for r in rows) else 0)
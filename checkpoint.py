@@ -0,0 +1,309 @@
+import mmap
+import os
+import struct
+from array import array
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from agent import PlayerAgent
+from memory import VoteMemory
+
+# 二进制快照格式（小端）：
+#   文件头 FILE_HEADER：魔数、版本、类型（全量/增量）、座位数、智能体数
+#   座位表：以\n拼接的UTF-8玩家名（长度前缀）
+#   索引表：每个智能体一项 ENTRY(名字长度, 数据偏移, 数据长度) + 名字
+#   数据区：每个智能体一段 AGENT_HEADER + 定长计数数组 + 变长记录数组
+# 加载时只解析文件头和索引表，各智能体的数据段在真正恢复时才从mmap中读取（惰性加载）
+MAGIC = b"WWCK"
+VERSION = 1
+FULL, DELTA = 0, 1
+FILE_HEADER = struct.Struct("<4sBBHI")
+ENTRY = struct.Struct("<HQI")
+# 局数、胜场、角色、存活、女巫药（bit0复活/bit1毒）、衰减计数、记录起点（增量：追加在已有记录之后）、记录数、高胜率目标数
+AGENT_HEADER = struct.Struct("<IIbBBqBII")
+ROLES = ("werewolf", "villager", "seer", "witch", "hunter")  # 角色编码（与batch_sim.ROLE_CODES一致）
+ROLE_CODES = {role: i for i, role in enumerate(ROLES)}
+
+
+def _signature(agent: PlayerAgent) -> tuple:
+    """判断智能体自上次快照后是否有变化（脏标记）"""
+    return (agent.history["vote_records"].appended, agent.game_count, agent.win_count, agent.role, agent.alive,
+            agent.witch_used["resurrect"], agent.witch_used["poison"], agent._memory_tick)
+
+
+def pack_agent(agent: PlayerAgent, records_since: int = None) -> bytes:
+    """把单个智能体打包为定长布局的二进制段
+
+    records_since：上次快照时的累计追加次数；给出时只写入此后新增的记录（增量），否则写入全部记录
+    """
+    memory = agent.history["vote_records"]
+    index = memory.index
+    n = len(agent.players)
+    present = np.zeros(n, dtype=np.uint8)
+    wins = np.zeros(n, dtype=np.float64)
+    totals = np.zeros(n, dtype=np.float64)
+    ticks = np.full(n, -1, dtype=np.int64)
+    suspicious = np.zeros(n, dtype=np.uint8)
+    for target, stats in agent.target_history.items():
+        i = index[target]
+        present[i] = 1
+        wins[i] = stats["win"]
+        totals[i] = stats["total"]
+    for target, tick in agent._target_ticks.items():
+        ticks[index[target]] = tick
+    for target in agent.history["suspicious_players"]:
+        suspicious[index[target]] = 1
+    effective = array("H", (index[t] for t in agent.effective_targets))
+
+    incremental = records_since is not None
+    count = memory.appended - records_since if incremental else len(memory)
+    targets, flags = memory.tail(count)
+    witch = int(agent.witch_used["resurrect"]) | int(agent.witch_used["poison"]) << 1
+    header = AGENT_HEADER.pack(agent.game_count, agent.win_count, ROLE_CODES.get(agent.role, -1), agent.alive, witch,
+                               agent._memory_tick, incremental, len(targets), len(effective))
+    return b"".join((header, present.tobytes(), wins.tobytes(), totals.tobytes(), ticks.tobytes(),
+                     suspicious.tobytes(), effective.tobytes(), targets.tobytes(), flags.tobytes()))
+
+
+def unpack_into(agent: PlayerAgent, buf, players: List[str]) -> None:
+    """把pack_agent的二进制段恢复到智能体（players为快照中的座位表）"""
+    (game_count, win_count, role, alive, witch, memory_tick, incremental, n_records,
+     n_effective) = AGENT_HEADER.unpack_from(buf, 0)
+    n = len(players)
+    offset = AGENT_HEADER.size
+
+    def take(dtype, count):
+        nonlocal offset
+        view = np.frombuffer(buf, dtype=dtype, count=count, offset=offset)
+        offset += view.nbytes
+        return view
+
+    present, wins, totals = take(np.uint8, n), take(np.float64, n), take(np.float64, n)
+    ticks, suspicious = take(np.int64, n), take(np.uint8, n)
+    effective, targets, flags = take(np.uint16, n_effective), take(np.uint16, n_records), take(np.uint8, n_records)
+
+    agent.game_count, agent.win_count = game_count, win_count
+    agent.role = ROLES[role] if role >= 0 else None
+    agent.alive = bool(alive)
+    agent.witch_used = {"resurrect": bool(witch & 1), "poison": bool(witch & 2)}
+    agent._memory_tick = memory_tick
+    cast = float if agent.memory_decay is not None else int  # 衰减模式下计数为小数
+    agent.target_history = {
+        players[i]: {"win": cast(wins[i]), "total": cast(totals[i])} for i in np.flatnonzero(present)
+    }
+    agent._target_ticks = {players[i]: int(ticks[i]) for i in np.flatnonzero(ticks >= 0)}
+    agent.history["suspicious_players"] = {players[i] for i in np.flatnonzero(suspicious)}
+    agent.effective_targets = dict.fromkeys(players[i] for i in effective)
+
+    if not incremental:
+        agent.history["vote_records"] = VoteMemory(agent.players, window=agent._record_window())
+    memory = agent.history["vote_records"]
+    if memory.players == players:
+        memory.extend_codes(array("H", targets.tobytes()), array("B", flags.tobytes()))
+    else:
+        # 座位表不同：按名字重新编码
+        for code, flag in zip(targets.tolist(), flags.tolist()):
+            memory.append(players[code], bool(flag & memory.WIN), bool(flag & memory.WOLF))
+    agent._memory_version += 1  # 作废掩码缓存
+    agent._update_win_rate()
+
+
+def write_snapshot(path: str, agents: Iterable[PlayerAgent], kind: int = FULL, since: Dict[str, int] = None) -> int:
+    """写一个快照文件（先写临时文件再原子替换），返回写入的智能体数
+
+    kind=DELTA时since为{玩家名: 上次快照时的累计追加次数}，只写入此后新增的记录
+    """
+    agents = list(agents)
+    players = agents[0].players if agents else []
+    names = [a.name.encode("utf-8") for a in agents]
+    blobs = [pack_agent(a, since.get(a.name) if kind == DELTA and since else None) for a in agents]
+    table = "\n".join(players).encode("utf-8")
+
+    head = FILE_HEADER.pack(MAGIC, VERSION, kind, len(players), len(agents)) + struct.pack("<I", len(table)) + table
+    index_size = sum(ENTRY.size + len(name) for name in names)
+    offset = len(head) + index_size
+    entries = []
+    for name, blob in zip(names, blobs):
+        entries.append(ENTRY.pack(len(name), offset, len(blob)) + name)
+        offset += len(blob)
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(head)
+        f.write(b"".join(entries))
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, path)
+    return len(agents)
+
+
+class SnapshotReader:
+    """惰性读取快照：打开时只解析文件头与索引表，智能体数据在load_into时才从mmap中读取"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.kind, num_players, num_agents = FILE_HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}不是受支持的快照文件")
+        pos = FILE_HEADER.size
+        (table_len,) = struct.unpack_from("<I", self._mmap, pos)
+        pos += 4
+        table = bytes(self._mmap[pos:pos + table_len]).decode("utf-8")
+        self.players = table.split("\n") if table else []
+        pos += table_len
+        self.entries: Dict[str, tuple] = {}  # {玩家名: (偏移, 长度)}
+        for _ in range(num_agents):
+            name_len, offset, length = ENTRY.unpack_from(self._mmap, pos)
+            pos += ENTRY.size
+            name = bytes(self._mmap[pos:pos + name_len]).decode("utf-8")
+            pos += name_len
+            self.entries[name] = (offset, length)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def load_into(self, agent: PlayerAgent) -> bool:
+        """恢复单个智能体，快照中没有该智能体时返回False"""
+        entry = self.entries.get(agent.name)
+        if entry is None:
+            return False
+        offset, length = entry
+        unpack_into(agent, memoryview(self._mmap)[offset:offset + length], self.players)
+        return True
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Checkpointer:
+    """全量+增量快照链：首次save写全量快照，之后只写有变化的智能体及其新增记录
+
+    文件按序号命名为{prefix}.{序号:05d}.ckpt；restore按顺序回放整条链。compact()重新写一份全量快照并开始新链
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.seq = 0
+        self._marks: Dict[str, tuple] = {}  # {玩家名: 上次快照时的脏标记}
+
+    def path(self, seq: int) -> str:
+        return f"{self.prefix}.{seq:05d}.ckpt"
+
+    def chain(self) -> List[str]:
+        """当前快照链（从最近一个全量快照开始）"""
+        paths = []
+        seq = 0
+        while os.path.exists(self.path(seq)):
+            paths.append(self.path(seq))
+            seq += 1
+        return paths
+
+    def save(self, agents: Iterable[PlayerAgent]) -> str:
+        """写下一个快照（第一次为全量，其余为增量），返回文件路径"""
+        agents = list(agents)
+        path = self.path(self.seq)
+        if self.seq == 0:
+            write_snapshot(path, agents, FULL)
+        else:
+            dirty = [a for a in agents if self._marks.get(a.name) != _signature(a)]
+            # 记忆被整体替换过（累计追加次数回退）的智能体写全量记录
+            since = {a.name: self._marks.get(a.name, (0,))[0] for a in dirty
+                     if self._marks.get(a.name, (0,))[0] <= a.history["vote_records"].appended}
+            write_snapshot(path, dirty, DELTA, since)
+        for a in agents:
+            self._marks[a.name] = _signature(a)
+        self.seq += 1
+        return path
+
+    def compact(self, agents: Iterable[PlayerAgent]) -> str:
+        """删除旧链并重新写一份全量快照"""
+        for path in self.chain():
+            os.remove(path)
+        self.seq = 0
+        self._marks = {}
+        return self.save(agents)
+
+    def restore(self, agents: Iterable[PlayerAgent]) -> int:
+        """按顺序回放快照链恢复智能体，返回回放的文件数；之后的save在链尾继续写增量"""
+        agents = list(agents)
+        paths = self.chain()
+        for path in paths:
+            with SnapshotReader(path) as reader:
+                for agent in agents:
+                    reader.load_into(agent)
+        self.seq = len(paths)
+        self._marks = {a.name: _signature(a) for a in agents}
+        return len(paths)
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import json
+    import shutil
+    import tempfile
+    import time
+
+    from game import ModeratorAgent
+
+    parser = argparse.ArgumentParser(description="二进制快照基准：与state_dict+JSON对比保存/加载耗时和大小")
+    parser.add_argument("--agents", type=int, default=2000, help="智能体数量")
+    parser.add_argument("--games", type=int, default=200, help="每9个智能体先运行的对局数（积累记忆）")
+    args = parser.parse_args()
+
+    # 运行一个九人局积累记忆，再复制成args.agents个智能体
+    moderator = ModeratorAgent(quiet=True)
+    asyncio.run(moderator.run(args.games))
+    source = list(moderator.player_agents.values())
+    agents = []
+    for i in range(args.agents):
+        agent = PlayerAgent(source[i % len(source)].name, players=moderator.players)
+        agent.load_state_dict(source[i % len(source)].state_dict())
+        agent.name = f"{agent.name}#{i}"
+        agents.append(agent)
+
+    workdir = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        with open(os.path.join(workdir, "state.json"), "w", encoding="utf-8") as f:
+            json.dump([a.state_dict() for a in agents], f, ensure_ascii=False)
+        json_save = time.perf_counter() - start
+        json_size = os.path.getsize(os.path.join(workdir, "state.json"))
+        start = time.perf_counter()
+        with open(os.path.join(workdir, "state.json"), encoding="utf-8") as f:
+            for agent, state in zip(agents, json.load(f)):
+                agent.load_state_dict(state)
+        json_load = time.perf_counter() - start
+
+        checkpointer = Checkpointer(os.path.join(workdir, "agents"))
+        start = time.perf_counter()
+        full_path = checkpointer.save(agents)
+        bin_save = time.perf_counter() - start
+        start = time.perf_counter()
+        Checkpointer(checkpointer.prefix).restore(agents)
+        bin_load = time.perf_counter() - start
+
+        # 只有部分智能体变化时的增量快照
+        for agent in agents[:len(agents) // 10]:
+            agent.update_history(agent.players[0], True, {p: "werewolf" for p in agent.players})
+            agent.game_count += 1
+        start = time.perf_counter()
+        delta_path = checkpointer.save(agents)
+        delta_save = time.perf_counter() - start
+
+        print(f"state_dict+JSON: save {json_save * 1000:.1f}ms | load {json_load * 1000:.1f}ms | {json_size} bytes")
+        print(f"binary full:     save {bin_save * 1000:.1f}ms | load {bin_load * 1000:.1f}ms | "
+              f"{os.path.getsize(full_path)} bytes")
+        print(f"binary delta (10% dirty): save {delta_save * 1000:.1f}ms | {os.path.getsize(delta_path)} bytes")
+    finally:
+        shutil.rmtree(workdir)
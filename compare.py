@@ -0,0 +1,99 @@
+"""配对策略比较（公共随机数）：两种策略在同一主种子下对局，第k局的发牌与各随机数流完全相同，
+逐局比较结果差异，抵消发牌/随机性带来的方差，达到同样显著性所需的局数远少于独立抽样
+
+用法：
+    python compare.py --a rule --b planner --camp werewolf --games 500 --seed 1
+    python compare.py --a rule --b window20 --metric rounds --games 2000
+"""
+import asyncio
+import math
+
+from game import ModeratorAgent
+
+# 预设策略：名称 -> 生成agent_kwargs的函数（每次比较新建，避免两侧共享规划器/缓存状态）
+STRATEGIES = {
+    "rule": lambda camp: {},
+    "window20": lambda camp: {"memory_window": 20},
+    "decay09": lambda camp: {"memory_decay": 0.9},
+    "planner": lambda camp: _planner_kwargs(camp)
+}
+CAMP_ROLES = {"werewolf": ("werewolf",), "good": ("villager", "seer", "witch", "hunter")}
+# 比较指标：单局结果 -> 数值（win为该阵营是否获胜，rounds为对局轮数）
+METRICS = {
+    "win": lambda result, camp: float(result["winner"] == camp),
+    "rounds": lambda result, camp: float(result["rounds"])
+}
+
+
+def _planner_kwargs(camp: str) -> dict:
+    from decision_cache import DecisionCache
+    from planner import RolloutPlanner
+
+    return {"planner": RolloutPlanner(rollouts=256, time_limit=0.05, seed=0, roles=CAMP_ROLES[camp]),
+            "decision_cache": DecisionCache()}
+
+
+def play(agent_kwargs: dict, games: int, seed: int, moderator_kwargs: dict = None) -> list:
+    """用主种子seed无头运行games局，返回逐局结果"""
+    moderator = ModeratorAgent(quiet=True, seed=seed, agent_kwargs=agent_kwargs, **(moderator_kwargs or {}))
+    results = asyncio.run(moderator.run(games))
+    planner = agent_kwargs.get("planner")
+    if planner is not None:
+        planner.close()
+    return results
+
+
+def _variance(values: list) -> float:
+    mean = sum(values) / len(values)
+    return sum((v - mean) ** 2 for v in values) / max(len(values) - 1, 1)
+
+
+def paired_compare(kwargs_a: dict, kwargs_b: dict, games: int, seed: int = 0, camp: str = "werewolf",
+                   moderator_kwargs: dict = None, metric: str = "win") -> dict:
+    """配对比较两种策略的某项指标（默认某阵营的胜率）：返回两侧均值、逐局配对差值的均值及其95%置信区间，
+    以及与独立抽样相比的方差缩减倍数（即独立抽样达到同样精度约需多少倍局数）
+    """
+    value = METRICS[metric]
+    a = [value(r, camp) for r in play(kwargs_a, games, seed, moderator_kwargs)]
+    b = [value(r, camp) for r in play(kwargs_b, games, seed, moderator_kwargs)]
+    n = len(a)
+    diffs = [x - y for x, y in zip(a, b)]
+    paired_var = _variance(diffs)
+    independent_var = _variance(a) + _variance(b)  # 两组独立抽样时差值的方差（单局）
+    return {
+        "games": n,
+        "metric": metric,
+        "mean_a": sum(a) / n,
+        "mean_b": sum(b) / n,
+        "diff": sum(diffs) / n,
+        "ci95": 1.96 * math.sqrt(paired_var / n),
+        "independent_ci95": 1.96 * math.sqrt(independent_var / n),
+        "discordant_games": sum(1 for d in diffs if d),
+        "variance_reduction": independent_var / paired_var if paired_var else float("inf")
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="配对策略比较（相同发牌与随机种子）")
+    parser.add_argument("--a", choices=list(STRATEGIES), default="rule", help="策略A")
+    parser.add_argument("--b", choices=list(STRATEGIES), default="window20", help="策略B")
+    parser.add_argument("--camp", choices=list(CAMP_ROLES), default="werewolf", help="比较该阵营的胜率（planner策略也只用于该阵营）")
+    parser.add_argument("--metric", choices=list(METRICS), default="win", help="比较指标：win胜率/rounds对局轮数")
+    parser.add_argument("--games", type=int, default=1000, help="每种策略的对局数")
+    parser.add_argument("--seed", type=int, default=0, help="主随机种子（两侧相同）")
+    parser.add_argument("--players", type=int, default=None, help="桌大小（默认九人局）")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = paired_compare(STRATEGIES[args.a](args.camp), STRATEGIES[args.b](args.camp), args.games, args.seed,
+                            args.camp, {"num_players": args.players} if args.players else None, args.metric)
+    elapsed = time.perf_counter() - start
+    label = f"{args.camp} win rate" if args.metric == "win" else "mean rounds"
+    print(f"{label}: {args.a}={report['mean_a']:.4f} | {args.b}={report['mean_b']:.4f}")
+    print(f"Paired difference: {report['diff']:+.4f} (95% CI ±{report['ci95']:.4f}, "
+          f"independent samples ±{report['independent_ci95']:.4f})")
+    print(f"Discordant games: {report['discordant_games']}/{report['games']} | "
+          f"variance reduction: {report['variance_reduction']:.1f}x | {elapsed:.2f}s")
@@ -0,0 +1,43 @@
+import math
+from typing import Dict, List, Tuple
+
+Z95 = 1.959964  # 95%双侧置信水平对应的正态分位数
+
+
+def wilson_interval(wins: float, total: float, z: float = Z95) -> Tuple[float, float]:
+    """胜率的Wilson得分区间（样本小或胜率接近0/1时也不会越界）；total为0时返回(0, 1)"""
+    if total <= 0:
+        return 0.0, 1.0
+    p = wins / total
+    z2 = z * z
+    center = (p + z2 / (2 * total)) / (1 + z2 / total)
+    half = z * math.sqrt(p * (1 - p) / total + z2 / (4 * total * total)) / (1 + z2 / total)
+    return max(center - half, 0.0), min(center + half, 1.0)
+
+
+def intervals(stats: Dict[str, dict], z: float = Z95) -> Dict[str, Tuple[float, float]]:
+    """{玩家: {"wins", "total"}} -> {玩家: (下界, 上界)}"""
+    return {name: wilson_interval(s["wins"], s["total"], z) for name, s in stats.items()}
+
+
+def ranking(stats: Dict[str, dict]) -> List[str]:
+    """按胜率（未取整）→胜场数→玩家名排序"""
+    return sorted(stats, key=lambda name: (-stats[name]["wins"] / max(stats[name]["total"], 1),
+                                           -stats[name]["wins"], name))
+
+
+def max_half_width(cis: Dict[str, Tuple[float, float]]) -> float:
+    return max(((hi - lo) / 2 for lo, hi in cis.values()), default=1.0)
+
+
+def ranking_settled(stats: Dict[str, dict], cis: Dict[str, Tuple[float, float]], precision: float = 0.0) -> bool:
+    """排名是否已在统计上确定：排名相邻的每一对玩家要么置信区间不重叠，
+    要么两者区间半宽都已不超过precision（真实胜率差小于精度，视为并列，继续对局也无法区分）
+    """
+    order = ranking(stats)
+    for upper, lower in zip(order, order[1:]):
+        separated = cis[upper][0] > cis[lower][1]
+        tied = max(cis[upper][1] - cis[upper][0], cis[lower][1] - cis[lower][0]) / 2 <= precision
+        if not (separated or tied):
+            return False
+    return True
@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+from eventlog import ROLES
+from state import GameState
+
+# 角色编码：每个座位3位（0~4与eventlog/batch_sim一致，7表示未分配角色）
+ROLE_BITS = 3
+ROLE_INDEX = {role: i for i, role in enumerate(ROLES)}
+UNASSIGNED = (1 << ROLE_BITS) - 1
+PHASE_CODES = {"night": 0, "day": 1}  # 与planner.PHASES一致
+MISSING = object()  # get()未命中时的返回值（缓存的决策本身可以是None）
+
+
+def layout_code(roles: list) -> int:
+    """座位→角色表编码为一个整数（座位i占第3i~3i+2位）"""
+    code = 0
+    for seat, role in enumerate(roles):
+        code |= ROLE_INDEX.get(role, UNASSIGNED) << (seat * ROLE_BITS)
+    return code
+
+
+class DecisionCache:
+    """按紧凑局面编码记忆决策结果的LRU缓存（OrderedDict，命中时移到末尾，超出容量时淘汰最久未用的）
+
+    用于推演/大模型等代价高、只取决于局面的决策：同一局面（角色布局、存活集合、候选集合、阵营、阶段、女巫用药）
+    在不同轮次、不同对局中重复出现时直接复用答案。多个智能体可共享同一个缓存
+    """
+
+    def __init__(self, maxsize: int = 65536):
+        if maxsize < 1:
+            raise ValueError("maxsize必须为正整数")
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._layout_roles = None  # 最近一次编码的角色表（同一局的所有快照共享同一个列表对象）
+        self._layout = 0
+
+    def key(self, state: GameState, candidates: int, wolf_camp: bool, phase: str,
+            witch_used: Optional[Dict[str, bool]] = None) -> int:
+        """局面的规范紧凑编码：角色布局 | 存活掩码 | 候选掩码 | 阵营/阶段/女巫用药标志，拼接为一个整数
+
+        witch_used为None表示不知道女巫用药情况（非女巫角色），与"都未使用"区分编码
+        """
+        if state.roles is not self._layout_roles:
+            self._layout = layout_code(state.roles)
+            self._layout_roles = state.roles
+        n = len(state.players)
+        flags = PHASE_CODES[phase] << 1 | wolf_camp
+        if witch_used is not None:
+            flags |= (4 | witch_used.get("resurrect", False) << 1 | witch_used.get("poison", False)) << 2
+        return ((self._layout << n | state.alive) << n | candidates) << 5 | flags
+
+    def get(self, key: Hashable):
+        value = self.entries.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
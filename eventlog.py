@@ -0,0 +1,185 @@
+import gzip
+import json
+from typing import Iterator, List
+
+from state import GameState
+
+# 角色编码（与batch_sim.ROLE_CODES一致），game_start记录中角色表为按座位拼接的编码串，如"013420101"
+ROLES = ("werewolf", "villager", "seer", "witch", "hunter")
+ROLE_CODES = {role: str(i) for i, role in enumerate(ROLES)}
+WINNERS = {"good": "g", "werewolf": "w"}
+WINNER_NAMES = {v: k for k, v in WINNERS.items()}
+
+# 紧凑记录格式：每个事件一行JSON数组，玩家一律用座位号（0起，-1表示无）
+#   ["G", 局号, 种子, 角色编码串]            开局
+#   ["K", 轮次, 被刀座位]                    狼人刀人
+#   ["W", 轮次, 女巫, 救的座位, 毒的座位]     女巫用药（只记录实际生效的救/毒）
+#   ["S", 轮次, 预言家, 查验座位, 是否狼人]   预言家验人（1狼人/0好人/-1未验）
+#   ["V", 轮次, [各座位投给谁], 出局座位]     白天投票（未投票的座位为-1）
+#   ["H", 轮次, 猎人, 被射座位]               猎人开枪
+#   ["E", 轮次, 胜方]                         结束（"g"好人/"w"狼人）
+# night_result可由K/W推出，不单独记录
+
+
+def _open(path: str, mode: str):
+    """.gz结尾的文件按gzip读写（追加写入会形成多成员gzip，读取时透明拼接）"""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class EventLogWriter:
+    """追加写入的紧凑事件日志，可直接作为ModeratorAgent的event_sink
+
+    用法：ModeratorAgent(quiet=True, event_sink=EventLogWriter("games.ndjson.gz"))
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = _open(path, "a")
+        self.seat = {}  # 本局 玩家名 -> 座位号（game_start时建立）
+        self.records = 0
+
+    def _s(self, name) -> int:
+        return self.seat.get(name, -1) if name is not None else -1
+
+    def encode(self, event: dict):
+        """事件字典 -> 紧凑记录（无需记录的事件返回None）"""
+        kind, round_num = event["event"], event["round"]
+        if kind == "game_start":
+            self.seat = {p: i for i, p in enumerate(event["players"])}
+            roles = "".join(ROLE_CODES[event["roles"][p]] for p in event["players"])
+            return ["G", event["game"], event.get("seed"), roles]
+        if kind == "wolf_kill":
+            return ["K", round_num, self._s(event["target"])]
+        if kind == "witch":
+            return ["W", round_num, self._s(event["witch"]), self._s(event["resurrect"]), self._s(event["poison"])]
+        if kind == "seer":
+            identity = event["identity"]
+            return ["S", round_num, self._s(event["seer"]), self._s(event["check"]),
+                    -1 if identity is None else int(identity == "狼人")]
+        if kind == "day_vote":
+            targets = [-1] * len(self.seat)
+            for voter, target in event["votes"].items():
+                targets[self.seat[voter]] = self._s(target)
+            return ["V", round_num, targets, self._s(event["eliminated"])]
+        if kind == "hunter_shot":
+            return ["H", round_num, self._s(event["hunter"]), self._s(event["target"])]
+        if kind == "game_over":
+            return ["E", round_num, WINNERS.get(event["winner"], "")]
+        return None
+
+    def __call__(self, event: dict) -> None:
+        record = self.encode(event)
+        if record is not None:
+            self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self.records += 1
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_records(path: str) -> Iterator[list]:
+    """逐行读取紧凑记录（流式，不整体载入内存）"""
+    with _open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_games(path: str) -> Iterator[List[list]]:
+    """按局分组：每次产出一局的记录列表（以G记录开头）"""
+    game = []
+    for record in read_records(path):
+        if record[0] == "G" and game:
+            yield game
+            game = []
+        game.append(record)
+    if game:
+        yield game
+
+
+def replay_game(records: List[list], upto_round: int = None) -> dict:
+    """由一局的记录重建对局状态（无需运行智能体）
+
+    upto_round：只回放到该轮结束时（None为整局）
+    返回{"game", "seed", "rounds", "winner", "state"(GameState), "votes"([(轮次, {投票者: 目标})])}
+    """
+    header = records[0]
+    if header[0] != "G":
+        raise ValueError("记录必须以game_start(G)开头")
+    _, game_no, seed, codes = header
+    players = [f"Player{i}" for i in range(1, len(codes) + 1)]  # 与game.make_players一致
+    state = GameState(players, {p: ROLES[int(c)] for p, c in zip(players, codes)})
+    names = state.players
+    rounds, winner, votes = 0, None, []
+
+    def kill(seat):
+        if seat >= 0:
+            state.alive &= ~(1 << seat)
+
+    for record in records[1:]:
+        kind, round_num = record[0], record[1]
+        if upto_round is not None and round_num > upto_round:
+            break
+        rounds = max(rounds, round_num)
+        if kind == "K":
+            kill(record[2])
+        elif kind == "W":
+            if record[3] >= 0:
+                state.alive |= 1 << record[3]
+            kill(record[4])
+        elif kind == "V":
+            votes.append((round_num, {names[v]: names[t] for v, t in enumerate(record[2]) if t >= 0}))
+            kill(record[3])
+        elif kind == "H":
+            kill(record[3])
+        elif kind == "E":
+            winner = WINNER_NAMES.get(record[2])
+    return {"game": game_no, "seed": seed, "rounds": rounds, "winner": winner, "state": state, "votes": votes}
+
+
+def find_game(path: str, game_no: int) -> List[list]:
+    """按局号查找一局的记录"""
+    for records in iter_games(path):
+        if records[0][1] == game_no:
+            return records
+    raise KeyError(f"日志中没有第{game_no}局")
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="紧凑事件日志：回放指定对局或校验整个日志")
+    parser.add_argument("path", help="事件日志路径（.ndjson或.ndjson.gz）")
+    parser.add_argument("--game", type=int, default=None, help="回放指定局号")
+    parser.add_argument("--round", type=int, default=None, help="只回放到该轮结束")
+    args = parser.parse_args()
+
+    if args.game is not None:
+        replayed = replay_game(find_game(args.path, args.game), args.round)
+        state = replayed["state"]
+        print(f"Game {replayed['game']} (seed={replayed['seed']}) | rounds={replayed['rounds']} | winner={replayed['winner']}")
+        for name in state.players:
+            print(f" - {name}: {state.role_of(name).upper():8s} {'alive' if state.is_alive(name) else 'dead'}")
+        for round_num, round_votes in replayed["votes"]:
+            print(f" round {round_num} votes: {round_votes}")
+    else:
+        # 校验：回放得到的存活状态与记录的胜方一致
+        start = time.perf_counter()
+        games = mismatched = 0
+        for records in iter_games(args.path):
+            replayed = replay_game(records)
+            state = replayed["state"]
+            expected = "good" if state.alive_wolves == 0 else "werewolf" if state.alive_wolves >= state.alive_good else None
+            games += 1
+            mismatched += expected != replayed["winner"]
+        elapsed = time.perf_counter() - start
+        print(f"Replayed {games} games in {elapsed:.2f}s ({games / max(elapsed, 1e-9):.0f} games/sec) | mismatched: {mismatched}")
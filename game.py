@@ -1,43 +1,177 @@
 import asyncio
+import inspect
 from agentscope.message import Msg
+from action import Action
+from confidence import Z95, intervals, max_half_width, ranking_settled, wilson_interval
+from gamelog import FULL, SILENT, GameLogger
+from seeding import derive_seed, stream
 from agent import PlayerAgent
+from state import GameState, ROLE_CONFIG  # ROLE_CONFIG定义在无依赖的state.py中（batch_sim也从那里导入）
+from tally import VoteTally
 import random
+import time
 
 # 全局配置（九人制狼人杀标准规则）
 TOTAL_PLAYERS = 9
 TOTAL_GAMES = 3  # 本地运行默认局数，API调用时可自定义
-ROLE_CONFIG = {
-    "werewolf": 3,    # 3狼人
-    "seer": 1,        # 1预言家
-    "witch": 1,       # 1女巫
-    "hunter": 1,      # 1猎人
-    "villager": 3     # 3平民
-}
 ALL_PLAYERS = [f"Player{i}" for i in range(1, TOTAL_PLAYERS + 1)]  # Player1-Player9
 
 
+def make_players(num_players: int) -> list:
+    """生成座位表：Player1-PlayerN"""
+    return [f"Player{i}" for i in range(1, num_players + 1)]
+
+
+def make_role_config(num_players: int) -> dict:
+    """按桌大小生成角色配置：约1/3为狼人，预言家/女巫/猎人各1，其余为平民（9人时与ROLE_CONFIG一致）"""
+    if num_players < 6:
+        raise ValueError("至少需要6名玩家")
+    wolves = num_players // 3
+    return {
+        "werewolf": wolves,
+        "seer": 1,
+        "witch": 1,
+        "hunter": 1,
+        "villager": num_players - wolves - 3
+    }
+
+
 class ModeratorAgent:
-    def __init__(self):
-        """初始化游戏主持人：创建所有玩家智能体、初始化统计数据"""
+    def __init__(self, quiet: bool = False, agent_kwargs: dict = None, num_players: int = None, role_config: dict = None,
+                 vote_weights: dict = None, tie_break: str = "random", tie_break_seed: int = None,
+                 decision_timeout: float = None, event_sink=None, stats_store=None, metrics=None, log_level=None,
+                 seed: int = None, agent_class=PlayerAgent, call_limiter=None):
+        """初始化游戏主持人：创建所有玩家智能体、初始化统计数据
+
+        quiet=True 时为无头（headless）模式：不输出任何终端日志，仅返回结构化结果，用于大批量对局
+        log_level：日志级别"silent"/"summary"/"full"（默认full；quiet=True时固定为silent），见gamelog.GameLogger
+        agent_kwargs：创建PlayerAgent时透传的参数（如memory_window/memory_decay）
+        num_players/role_config：桌大小与角色配置（默认九人局ROLE_CONFIG；只给num_players时按make_role_config生成）
+        vote_weights：白天投票的票权{玩家: 票数}（如警长1.5票）；tie_break/tie_break_seed：平票处理策略及其随机种子（见VoteTally）
+        decision_timeout：单个智能体单次决策的超时秒数（None为不限时）；超时按fallback_action给出确定性的兜底动作
+        event_sink：对局事件回调（普通函数或协程函数，如asyncio.Queue.put），每个事件为一个字典，见_emit
+        stats_store：持久化统计（stats_store.StatsStore），每局结束后记录，按批次写入SQLite
+        metrics：对局指标（metrics.GameMetrics），记录各阶段耗时与单次决策耗时（None为不采集）
+        seed：主随机种子；设置后每局的发牌、主持人兜底/平票、每个智能体都使用由(主种子, 局号)派生的独立随机数流，
+              不再读写全局random（同一主种子下第k局的发牌与各随机数流与策略无关，可用于配对比较，见compare.py）
+        agent_class：玩家智能体类（默认PlayerAgent，可换成大模型驱动等PlayerAgent子类）
+        call_limiter：多桌共享的在途决策限流器（tables.FairLimiter），每次智能体决策前先取得调用名额
+        """
+        if role_config is None:
+            role_config = make_role_config(num_players) if num_players else ROLE_CONFIG
+        if num_players is not None and num_players != sum(role_config.values()):
+            raise ValueError("num_players与role_config的角色总数不一致")
+        self.role_config = dict(role_config)
+        self.players = make_players(sum(self.role_config.values()))
         self.game_count = 0  # 已进行游戏局数
+        self.quiet = quiet  # 无头模式开关
+        self.logger = GameLogger(SILENT if quiet else (log_level if log_level is not None else FULL))
+        self.vote_weights = vote_weights or {}
+        self.tie_break = tie_break
+        self.tie_break_seed = tie_break_seed
+        self.tie_rng = random.Random(tie_break_seed) if tie_break_seed is not None else random
+        self.seed = seed
+        self.rng = random       # 主持人兜底选择（女巫毒人、猎人开枪、无效投票）使用的随机数流
+        self.deal_rng = random  # 发牌使用的随机数流
+        self.deal_blocks = 0    # 已生成的分层发牌块数（见stratified_deals）
+        self.decision_timeout = decision_timeout
+        self.decision_timeouts = 0  # 累计超时次数
+        self.event_sink = event_sink
+        self.stats_store = stats_store
+        self.metrics = metrics
+        self.call_limiter = call_limiter
         # 为每个玩家创建PlayerAgent实例
-        self.player_agents = {name: PlayerAgent(name) for name in ALL_PLAYERS}
+        self.player_agents = {
+            name: agent_class(name, players=self.players, **(agent_kwargs or {}))
+            for name in self.players
+        }
         # 玩家胜率统计（总局数、胜场数、胜率）
         self.final_stats = {
             name: {"total": 0, "wins": 0, "win_rate": 0.0} 
-            for name in ALL_PLAYERS
+            for name in self.players
         }
 
+    @staticmethod
+    def fallback_action(agent: PlayerAgent, state: GameState = None, alive_players: list = None) -> Action:
+        """决策超时的兜底动作：投座位顺序上第一个其他存活玩家，不使用任何技能（不消耗随机数，结果可复现）"""
+        if state is not None:
+            candidates = state.names(state.alive & ~state.bit(agent.name))
+        else:
+            candidates = [p for p in alive_players or [] if p != agent.name]
+        return Action(vote=candidates[0] if candidates else None, say="（决策超时，按默认动作处理）")
+
+    async def _decide(self, agent: PlayerAgent, role_map: dict, alive_players: list, state: GameState = None,
+                      action_type: str = "vote") -> Action:
+        """获取单个智能体的决策：设置了call_limiter时先排队取得调用名额（排队时间不计入决策超时）"""
+        if self.call_limiter is None:
+            return await self._timed_decide(agent, role_map, alive_players, state, action_type)
+        async with self.call_limiter.slot(self):
+            return await self._timed_decide(agent, role_map, alive_players, state, action_type)
+
+    async def _timed_decide(self, agent: PlayerAgent, role_map: dict, alive_players: list, state: GameState = None,
+                            action_type: str = "vote") -> Action:
+        """执行单个智能体的决策：设置了decision_timeout时超时即返回兜底动作"""
+        start = time.perf_counter()
+        decision = agent.act(role_map=role_map, alive_players=alive_players, action_type=action_type, state=state)
+        try:
+            if self.decision_timeout is None:
+                return await decision
+            return await asyncio.wait_for(decision, self.decision_timeout)
+        except asyncio.TimeoutError:
+            self.decision_timeouts += 1
+            if self.metrics is not None:
+                self.metrics.timeouts_total.inc()
+            self.logger.full("⏰ {} decision timed out ({}s), using fallback action", agent.name, self.decision_timeout)
+            return self.fallback_action(agent, state, alive_players)
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_decision(agent.role, action_type, start)
+
+    def seed_streams(self, game_seed: int) -> None:
+        """由本局种子派生本局的各条随机数流：发牌、主持人、平票（未指定tie_break_seed时）、每个智能体各一条"""
+        self.deal_rng = stream(game_seed, "deal")
+        self.rng = stream(game_seed, "moderator")
+        if self.tie_break_seed is None:
+            self.tie_rng = stream(game_seed, "tie")
+        for name, agent in self.player_agents.items():
+            agent.rng = stream(game_seed, "agent", name)
+
+    def _observe_phase(self, phase: str, start: float) -> None:
+        """记录阶段耗时（未启用metrics时跳过）"""
+        if self.metrics is not None:
+            self.metrics.observe_phase(phase, start)
+
+    async def _collect(self, agents: list, role_map: dict, alive_players: list, state: GameState = None,
+                       action_type: str = "vote") -> list:
+        """并发收集多个互不依赖的决策（阶段耗时约等于最慢的单个智能体），结果与agents顺序一致"""
+        if len(agents) == 1:  # 单个决策无需创建任务
+            return [await self._decide(agents[0], role_map, alive_players, state, action_type)]
+        return await asyncio.gather(*(
+            self._decide(agent, role_map, alive_players, state, action_type) for agent in agents
+        ))
+
+    async def _emit(self, event: str, round_num: int = 0, **fields) -> None:
+        """向event_sink推送一个对局事件：{"event", "game", "round", ...}（未设置event_sink时直接跳过）
+
+        事件类型：game_start（players/roles/seed）、wolf_kill（target）、witch（resurrect/poison）、night_result（eliminated）、
+        seer（check/identity）、day_vote（votes/eliminated）、hunter_shot（hunter/target）、game_over（winner/rounds）
+        """
+        if self.event_sink is None:
+            return
+        result = self.event_sink({"event": event, "game": self.game_count, "round": round_num, **fields})
+        if inspect.isawaitable(result):
+            await result  # 协程回调（如有界队列的put）可借此对对局施加背压
+
     def assign_roles(self) -> dict:
-        """随机分配角色：按ROLE_CONFIG比例打乱，返回{玩家名: 角色}字典"""
+        """随机分配角色：按本桌角色配置打乱，返回{玩家名: 角色}字典"""
         roles = []
         # 按配置生成角色列表
-        for role, count in ROLE_CONFIG.items():
+        for role, count in self.role_config.items():
             roles.extend([role] * count)
         # 随机打乱角色顺序
-        random.shuffle(roles)
+        self.deal_rng.shuffle(roles)
         # 绑定玩家与角色
-        return dict(zip(ALL_PLAYERS, roles))
+        return dict(zip(self.players, roles))
 
     async def send_private_role(self, player_agent: PlayerAgent, role: str) -> None:
         """向玩家发送私有角色信息（符合AgentScope框架消息格式）"""
@@ -50,244 +184,294 @@ class ModeratorAgent:
         await player_agent.observe(private_msg)
 
     def get_alive_players(self, role_map: dict, eliminated: list) -> list:
-        """获取当前存活玩家列表：排除已淘汰玩家"""
+        """获取当前存活玩家列表：排除已淘汰玩家（对局内部使用GameState位掩码，此方法保留给按名字调用的场景）"""
+        eliminated = set(eliminated)
         return [
-            p for p in ALL_PLAYERS 
+            p for p in self.players 
             if p not in eliminated  # 未被淘汰
             and role_map.get(p) is not None  # 角色分配有效
         ]
 
-    async def wolf_discussion(self, wolf_agents: list, role_map: dict, alive_players: list) -> list:
+    async def wolf_discussion(self, wolf_agents: list, role_map: dict, alive_players: list, state: GameState = None) -> list:
         """狼人讨论阶段：3轮讨论，批量异步获取狼人建议（适配Vercel无阻塞运行）"""
         discussion_records = []
         for round_num in range(1, 4):  # 共3轮讨论
             discussion_records.append(f"\n--- 狼人讨论第{round_num}轮 ---")
-            # 批量创建异步任务（减少Vercel环境下的阻塞时间）
-            tasks = [
-                agent(
-                    role_map=role_map, 
-                    alive_players=alive_players, 
-                    action_type="discussion"  # 标记为“讨论”动作
-                ) 
-                for agent in wolf_agents
-            ]
-            # 批量执行任务并获取结果
-            proposal_msgs = await asyncio.gather(*tasks)
+            # 并发获取所有狼人的建议（每个狼人单独限时）
+            proposals = await self._collect(wolf_agents, role_map, alive_players, state, action_type="discussion")
             # 整理讨论记录（玩家名+建议内容）
-            for agent, msg in zip(wolf_agents, proposal_msgs):
-                proposal = msg.content[0]["text"]
-                discussion_records.append(f"🐺 {agent.name}: {proposal}")
+            for agent, proposal in zip(wolf_agents, proposals):
+                discussion_records.append(f"🐺 {agent.name}: {proposal.say}")
         return discussion_records
 
-    async def get_wolf_target(self, wolf_agents: list, role_map: dict, alive_players: list) -> str:
+    async def get_wolf_target(self, wolf_agents: list, role_map: dict, alive_players: list, state: GameState = None) -> str:
         """获取狼人统一刀人目标：统计狼人投票最高票，无票时随机兜底"""
-        targets = []
-        # 收集每个狼人的目标选择
-        for agent in wolf_agents:
-            # 调用PlayerAgent获取目标（action_type默认"vote"）
-            target_msg = await agent(role_map=role_map, alive_players=alive_players)
-            # 解析消息内容（转为字典），无vote字段时随机选存活玩家（兜底）
-            target_data = eval(target_msg.content[0]["text"])
-            target = target_data.get(
-                "vote", 
-                random.choice([p for p in alive_players if p != agent.name])
-            )
-            targets.append(target)
+        tally = VoteTally(tie_break=self.tie_break, rng=self.tie_rng)
+        # 并发收集每个狼人的目标选择（结构化动作，action_type为"kill"）
+        actions = await self._collect(wolf_agents, role_map, alive_players, state, action_type="kill")
+        for agent, action in zip(wolf_agents, actions):
+            # 无vote目标时随机选存活玩家（兜底）
+            target = action.vote or self.rng.choice([p for p in alive_players if p != agent.name])
+            tally.add(agent.name, target)
         
-        # 统计最高票目标
-        target_counts = {t: targets.count(t) for t in targets}
-        max_count = max(target_counts.values())
-        candidate_targets = [t for t, c in target_counts.items() if c == max_count]
-        # 票数相同时随机选择
-        return random.choice(candidate_targets)
-
-    async def daytime_voting(self, alive_agents: list, role_map: dict, alive_players: list) -> tuple:
-        """白天投票阶段：收集所有存活玩家投票，返回淘汰者、投票详情、投票记录"""
-        votes = {}  # {投票者: 被投票者}
+        # 一次遍历计票，最高票为刀人目标（平票按平票策略处理）
+        return tally.winner()
+
+    async def daytime_voting(self, alive_agents: list, role_map: dict, alive_players: list, state: GameState = None) -> tuple:
+        """白天投票阶段：收集所有存活玩家投票，返回淘汰者、投票详情、投票记录、计票器"""
+        tally = VoteTally(weights=self.vote_weights, tie_break=self.tie_break, rng=self.tie_rng)
         vote_details = []  # 投票详情（用于日志输出）
         
-        # 收集每个存活玩家的投票
-        for agent in alive_agents:
-            # 调用PlayerAgent获取投票目标
-            vote_msg = await agent(role_map=role_map, alive_players=alive_players)
-            vote_text = vote_msg.content[0]["text"]
-            vote_data = eval(vote_text)
-            
-            # 兜底逻辑：无vote字段时随机投其他存活玩家
-            target = vote_data.get(
-                "vote", 
-                random.choice([p for p in alive_players if p != agent.name])
-            )
-            votes[agent.name] = target
-            # 记录投票详情（含玩家完整发言）
-            vote_details.append(f"🗳️ {agent.name}: {vote_text}")
+        # 并发收集每个存活玩家的结构化投票动作，再按座位顺序计票
+        actions = await self._collect(alive_agents, role_map, alive_players, state)
+        for agent, action in zip(alive_agents, actions):
+            # 兜底逻辑：无vote目标时随机投其他存活玩家
+            target = action.vote or self.rng.choice([p for p in alive_players if p != agent.name])
+            tally.add(agent.name, target)
+            # 记录投票详情（含玩家完整发言，仅完整日志级别才序列化）
+            if self.logger.full_enabled:
+                vote_details.append(f"🗳️ {agent.name}: {action.to_json()}")
         
-        # 统计投票结果，确定淘汰者
-        target_counts = {t: list(votes.values()).count(t) for t in votes.values()}
-        max_count = max(target_counts.values())
-        candidate_targets = [t for t, c in target_counts.items() if c == max_count]
-        eliminated = random.choice(candidate_targets)
+        # 统计投票结果，确定淘汰者（平票且策略为none时无人出局）
+        eliminated = tally.winner()
         
-        return eliminated, vote_details, votes
+        return eliminated, vote_details, tally.votes, tally
+
+    def stratified_deals(self):
+        """分层发牌（生成器，每次产出一局的按座位角色列表）：每n局（n为座位数）为一个轮转块，
+        块首随机打乱角色表，块内第j局将其循环右移j位——每个座位在一个块内恰好轮到角色表的每个位置一次，
+        各角色的次数与角色配置成比例。设置了主种子时每块的打乱由(主种子, 块号)派生，可复现
+        """
+        base = [role for role, count in self.role_config.items() for _ in range(count)]
+        while True:
+            self.deal_blocks += 1
+            (stream(self.seed, "block", self.deal_blocks) if self.seed is not None else random).shuffle(base)
+            for shift in range(len(base)):
+                yield base[-shift:] + base[:-shift] if shift else list(base)
 
-    async def run_game(self) -> None:
-        """运行单局游戏：完整流程（角色分配→昼夜交替→胜负判定→统计更新）"""
+    async def run_game(self, seed: int = None, roles=None) -> dict:
+        """运行单局游戏：完整流程（角色分配→昼夜交替→胜负判定→统计更新）
+
+        seed：本局种子（写入game_start事件，便于事件日志定位与复现），本局各随机数流由它派生（不修改全局random；
+              未设置主种子时之后不传种子的局沿用这些随机数流）；设置了主种子时不传则为derive_seed(主种子, 局号)
+        roles：指定本局发牌（按座位的角色列表或{玩家: 角色}，角色数须与本桌配置一致），不传则随机发牌
+        返回结构化的单局结果：{"game", "winner", "rounds", "roles", "eliminations", "votes"}
+        """
+        if roles is not None:
+            role_map = dict(roles) if isinstance(roles, dict) else dict(zip(self.players, roles))
+            counts = {}
+            for role in role_map.values():
+                counts[role] = counts.get(role, 0) + 1
+            if set(role_map) != set(self.players) or counts != {r: c for r, c in self.role_config.items() if c}:
+                raise ValueError("roles必须为每个座位指定角色，且各角色数与本桌角色配置一致")
         self.game_count += 1
-        print(f"\n==================== 第{self.game_count}局游戏 ====================")
+        if seed is None and self.seed is not None:
+            seed = derive_seed(self.seed, self.game_count)
+        if seed is not None:
+            self.seed_streams(seed)
+        log = self.logger
+        log.summary("\n==================== 第{}局游戏 ====================", self.game_count)
         
         # 初始化本局变量
-        role_map = self.assign_roles()  # 随机分配角色
-        eliminated = []  # 已淘汰玩家列表
+        if roles is None:
+            role_map = self.assign_roles()  # 随机分配角色
+        state = GameState(self.players, role_map)  # 座位号+存活位掩码表示的对局状态
         game_over = False  # 游戏是否结束
         round_num = 1  # 当前轮次（昼夜为一轮）
+        eliminations = []  # 淘汰记录：[{"round", "player", "cause"}]
+        vote_rounds = []  # 每轮白天投票记录：[{"round", "votes", "eliminated"}]
+        winner = None  # 获胜阵营："good" / "werewolf"
         
-        # 1. 向所有玩家发送私有角色信息
+        # 1. 向所有玩家发送私有角色信息，并让玩家一次性构建本局阵营索引
         for name, role in role_map.items():
             await self.send_private_role(self.player_agents[name], role)
+            self.player_agents[name].begin_game(state)
+        await self._emit("game_start", players=self.players, roles=role_map, seed=seed)
         
         # 2. 开局提示（日志输出）
-        print(f"\n📢 Moderator: A new game is starting! Players: {', '.join(ALL_PLAYERS)}.")
-        print("Assigning roles privately...")
-        print(f"\n🎭 All Roles (for demo):")
-        for name, role in role_map.items():
-            print(f" - {name}: {role.upper()}")
+        if log.full_enabled:
+            log.full(f"\n📢 Moderator: A new game is starting! Players: {', '.join(self.players)}.")
+            log.full("Assigning roles privately...")
+            log.full(f"\n🎭 All Roles (for demo):")
+            for name, role in role_map.items():
+                log.full(f" - {name}: {role.upper()}")
         
         # 3. 游戏主循环（昼夜交替，直到分出胜负）
         while not game_over:
-            print(f"\n--- 第{round_num}轮（夜晚+白天）---")
-            alive_players = self.get_alive_players(role_map, eliminated)
+            log.full("\n--- 第{}轮（夜晚+白天）---", round_num)
+            # 本轮开始时的存活快照（本轮所有决策都基于该快照），名字列表只用于日志和Msg
+            snapshot = state.snapshot()
+            alive_players = snapshot.alive_names()
             # 获取当前存活的狼人及对应智能体
-            wolf_players = [p for p in alive_players if role_map[p] == "werewolf"]
+            wolf_players = snapshot.alive_of("werewolf")
             wolf_agents = [self.player_agents[p] for p in wolf_players]
 
             # ------------------- 夜晚阶段 -------------------
-            print(f"\n📢 Moderator:")
-            print("🌙 Night falls! Everyone close eyes. Werewolves open eyes!")
-            print(f"🗣️ Werewolves (alive): {', '.join(wolf_players) if wolf_players else 'None'}")
+            if log.full_enabled:
+                log.full(f"\n📢 Moderator:")
+                log.full("🌙 Night falls! Everyone close eyes. Werewolves open eyes!")
+                log.full(f"🗣️ Werewolves (alive): {', '.join(wolf_players) if wolf_players else 'None'}")
             
             # 狼人刀人（至少1只狼存活才进行）
             wolf_target = None
             if len(wolf_agents) >= 1:
                 # 狼人讨论（3轮）
-                discussion_records = await self.wolf_discussion(wolf_agents, role_map, alive_players)
-                print("\n🗣️ Werewolf Discussion (3 rounds):")
-                print('\n'.join(discussion_records))
+                phase_start = time.perf_counter()
+                discussion_records = await self.wolf_discussion(wolf_agents, role_map, alive_players, snapshot)
+                self._observe_phase("wolf_discussion", phase_start)
+                if log.full_enabled:
+                    log.full("\n🗣️ Werewolf Discussion (3 rounds):")
+                    log.full('\n'.join(discussion_records))
                 
                 # 狼人统一刀人目标
-                wolf_target = await self.get_wolf_target(wolf_agents, role_map, alive_players)
-                print(f"\n🐺 Werewolves reach agreement: Eliminate {wolf_target}!")
+                phase_start = time.perf_counter()
+                wolf_target = await self.get_wolf_target(wolf_agents, role_map, alive_players, snapshot)
+                log.full("\n🐺 Werewolves reach agreement: Eliminate {}!", wolf_target)
                 
                 # 狼人确认目标（输出确认信息）
-                print(f"\n📢 Moderator (to werewolves): Confirm eliminate {wolf_target}!")
-                for agent in wolf_agents:
-                    confirm_msg = await agent(role_map=role_map, alive_players=alive_players)
-                    print(f"🐺 {agent.name}: {confirm_msg.content[0]['text']}")
+                log.full("\n📢 Moderator (to werewolves): Confirm eliminate {}!", wolf_target)
+                confirm_actions = await self._collect(wolf_agents, role_map, alive_players, snapshot)
+                for agent, confirm_action in zip(wolf_agents, confirm_actions):
+                    if log.full_enabled:
+                        log.full(f"🐺 {agent.name}: {confirm_action.to_json()}")
+                self._observe_phase("wolf_vote", phase_start)
                 
                 # 标记被刀玩家为淘汰
-                if wolf_target not in eliminated:
-                    eliminated.append(wolf_target)
+                if wolf_target is not None and state.kill(wolf_target):
                     self.player_agents[wolf_target].mark_dead()  # 更新玩家存活状态
+                    eliminations.append({"round": round_num, "player": wolf_target, "cause": "wolf"})
+                await self._emit("wolf_kill", round_num, target=wolf_target)
             
             # 女巫用药（仅当前存活女巫可操作）
-            witch_players = [p for p in alive_players if role_map[p] == "witch"]
+            witch_players = snapshot.alive_of("witch")
             if witch_players:
                 witch_agent = self.player_agents[witch_players[0]]
-                print(f"\n📢 Moderator:")
-                print("🧙 Witch's turn: Open eyes! You have poison/resurrect potion (one-time use).")
+                if log.full_enabled:
+                    log.full(f"\n📢 Moderator:")
+                    log.full("🧙 Witch's turn: Open eyes! You have poison/resurrect potion (one-time use).")
                 
                 # 获取女巫操作（复活/毒人）
-                witch_action = await witch_agent(role_map=role_map, alive_players=alive_players)
-                witch_text = witch_action.content[0]["text"]
-                witch_data = eval(witch_text)
-                print(f"🧙 {witch_agent.name}: {witch_text}")
+                phase_start = time.perf_counter()
+                witch_action = await self._decide(witch_agent, role_map, alive_players, snapshot)
+                if log.full_enabled:
+                    log.full(f"🧙 {witch_agent.name}: {witch_action.to_json()}")
                 
+                resurrected = poisoned = None
                 # 女巫复活（仅被刀玩家可复活，且复活药未使用）
-                if witch_data.get("resurrect") and not witch_agent.witch_used["resurrect"]:
-                    if wolf_target and wolf_target in eliminated:
-                        eliminated.remove(wolf_target)
+                if witch_action.resurrect and not witch_agent.witch_used["resurrect"]:
+                    if wolf_target and not state.is_alive(wolf_target):
+                        state.revive(wolf_target)
                         self.player_agents[wolf_target].alive = True  # 恢复存活状态
-                        print(f"🧙 Witch resurrects {wolf_target}!")
+                        eliminations = [e for e in eliminations if not (e["round"] == round_num and e["player"] == wolf_target)]
+                        resurrected = wolf_target
+                        log.full("🧙 Witch resurrects {}!", wolf_target)
                     witch_agent.witch_used["resurrect"] = True  # 标记复活药已使用
                 
                 # 女巫毒人（仅存活玩家可毒，且毒药未使用）
-                if witch_data.get("poison") and not witch_agent.witch_used["poison"]:
+                if witch_action.poison and not witch_agent.witch_used["poison"]:
                     # 优先毒存活狼人，无狼人时随机毒存活玩家（兜底）
-                    poison_candidates = [p for p in alive_players if role_map[p] == "werewolf"] or alive_players
-                    poison_target = random.choice(poison_candidates)
-                    if poison_target not in eliminated and poison_target != witch_agent.name:
-                        eliminated.append(poison_target)
+                    poison_candidates = wolf_players or alive_players
+                    poison_target = self.rng.choice(poison_candidates)
+                    if poison_target != witch_agent.name and state.kill(poison_target):
                         self.player_agents[poison_target].mark_dead()  # 标记死亡
-                        print(f"🧙 Witch poisons {poison_target}!")
+                        eliminations.append({"round": round_num, "player": poison_target, "cause": "poison"})
+                        poisoned = poison_target
+                        log.full("🧙 Witch poisons {}!", poison_target)
                     witch_agent.witch_used["poison"] = True  # 标记毒药已使用
+                self._observe_phase("witch", phase_start)
+                await self._emit("witch", round_num, witch=witch_agent.name, resurrect=resurrected, poison=poisoned)
 
             # ------------------- 白天阶段 -------------------
-            print(f"\n📢 Moderator:")
-            print("☀️ Day breaks! Everyone open eyes!")
-            # 公布夜间淘汰玩家
-            current_eliminated = [p for p in eliminated if p in alive_players]
+            if log.full_enabled:
+                log.full(f"\n📢 Moderator:")
+                log.full("☀️ Day breaks! Everyone open eyes!")
+            # 公布夜间淘汰玩家（按淘汰先后顺序）
+            current_eliminated = [e["player"] for e in eliminations if e["round"] == round_num]
+            await self._emit("night_result", round_num, eliminated=current_eliminated)
             if current_eliminated:
-                print(f"📢 Moderator: Eliminated player(s) last night: {', '.join(current_eliminated)}!")
+                if log.full_enabled:
+                    log.full(f"📢 Moderator: Eliminated player(s) last night: {', '.join(current_eliminated)}!")
                 # 输出被淘汰玩家的“遗言”
-                for p in current_eliminated:
-                    dead_agent = self.player_agents[p]
-                    last_word_msg = await dead_agent(role_map=role_map, alive_players=alive_players)
-                    print(f"💀 {p} (last word): {last_word_msg.content[0]['text']}")
+                phase_start = time.perf_counter()
+                dead_agents = [self.player_agents[p] for p in current_eliminated]
+                last_words = await self._collect(dead_agents, role_map, alive_players, snapshot)
+                self._observe_phase("last_words", phase_start)
+                for p, last_word in zip(current_eliminated, last_words):
+                    if log.full_enabled:
+                        log.full(f"💀 {p} (last word): {last_word.to_json()}")
             else:
-                print(f"📢 Moderator: No one was eliminated last night!")
+                log.full("📢 Moderator: No one was eliminated last night!")
             
             # 预言家验人（仅当前存活预言家可操作）
-            seer_players = [p for p in alive_players if role_map[p] == "seer"]
+            seer_players = snapshot.alive_of("seer")
             if seer_players:
                 seer_agent = self.player_agents[seer_players[0]]
-                print(f"\n📢 Moderator:")
-                print("🔮 Seer's turn: Open eyes! Check one player's identity.")
+                if log.full_enabled:
+                    log.full(f"\n📢 Moderator:")
+                    log.full("🔮 Seer's turn: Open eyes! Check one player's identity.")
                 # 获取预言家验人结果
-                seer_action = await seer_agent(role_map=role_map, alive_players=alive_players)
-                print(f"🔮 {seer_agent.name}: {seer_action.content[0]['text']}")
+                phase_start = time.perf_counter()
+                seer_action = await self._decide(seer_agent, role_map, alive_players, snapshot)
+                self._observe_phase("seer", phase_start)
+                if log.full_enabled:
+                    log.full(f"🔮 {seer_agent.name}: {seer_action.to_json()}")
+                await self._emit("seer", round_num, seer=seer_agent.name, check=seer_action.check, identity=seer_action.identity)
             
             # 全体投票淘汰（存活玩家参与）
             alive_agents = [self.player_agents[p] for p in alive_players]
-            print(f"\n📢 Moderator:")
-            print(f"🗣️ Alive players: {', '.join(alive_players)}")
-            print("🗳️ Daytime voting: All alive players vote to eliminate one player!")
+            if log.full_enabled:
+                log.full(f"\n📢 Moderator:")
+                log.full(f"🗣️ Alive players: {', '.join(alive_players)}")
+                log.full("🗳️ Daytime voting: All alive players vote to eliminate one player!")
             # 执行投票
-            vote_eliminated, vote_details, votes = await self.daytime_voting(alive_agents, role_map, alive_players)
+            phase_start = time.perf_counter()
+            vote_eliminated, vote_details, votes, tally = await self.daytime_voting(alive_agents, role_map, alive_players, snapshot)
+            self._observe_phase("day_vote", phase_start)
+            vote_rounds.append({"round": round_num, "votes": votes, "eliminated": vote_eliminated})
+            await self._emit("day_vote", round_num, votes=votes, eliminated=vote_eliminated)
             # 输出投票详情
-            print('\n'.join(vote_details))
-            print(f"\n📢 Moderator: Public voting result: {vote_eliminated} (votes: {list(votes.values()).count(vote_eliminated)}) is eliminated!")
+            if log.full_enabled:
+                log.full('\n'.join(vote_details))
+                if vote_eliminated is not None:
+                    log.full(f"\n📢 Moderator: Public voting result: {vote_eliminated} (votes: {tally.count(vote_eliminated)}) is eliminated!")
+                else:
+                    log.full(f"\n📢 Moderator: Public voting result: tie between {', '.join(tally.leaders())}, no one is eliminated!")
             
             # 标记投票淘汰玩家
-            if vote_eliminated not in eliminated:
-                eliminated.append(vote_eliminated)
+            if vote_eliminated is not None and state.kill(vote_eliminated):
                 self.player_agents[vote_eliminated].mark_dead()  # 更新存活状态
+                eliminations.append({"round": round_num, "player": vote_eliminated, "cause": "vote"})
             
             # 猎人开枪（被投票淘汰且猎人存活时触发）
-            if role_map.get(vote_eliminated) == "hunter" and vote_eliminated in alive_players:
+            if role_map.get(vote_eliminated) == "hunter" and snapshot.is_alive(vote_eliminated):
+                phase_start = time.perf_counter()
                 hunter_agent = self.player_agents[vote_eliminated]
-                hunter_action = await hunter_agent(role_map=role_map, alive_players=alive_players)
-                hunter_data = eval(hunter_action.content[0]["text"])
+                hunter_action = await self._decide(hunter_agent, role_map, alive_players, snapshot)
                 # 猎人选择是否开枪
-                if hunter_data.get("shoot"):
+                if hunter_action.shoot:
                     # 优先射存活狼人，无狼人时随机射存活玩家（兜底）
-                    shoot_candidates = [p for p in alive_players if role_map[p] == "werewolf"] or [p for p in alive_players if p != vote_eliminated]
-                    shoot_target = hunter_data.get("vote", random.choice(shoot_candidates))
-                    if shoot_target in alive_players and shoot_target != vote_eliminated:
-                        eliminated.append(shoot_target)
+                    shoot_target = hunter_action.vote or self.rng.choice(
+                        wolf_players or snapshot.names(snapshot.alive & ~snapshot.bit(vote_eliminated))
+                    )
+                    if snapshot.is_alive(shoot_target) and shoot_target != vote_eliminated:
+                        state.kill(shoot_target)
                         self.player_agents[shoot_target].mark_dead()
-                        print(f"\n🔫 Hunter {vote_eliminated} shoots {shoot_target}! {shoot_target} is eliminated!")
+                        eliminations.append({"round": round_num, "player": shoot_target, "cause": "hunter"})
+                        log.full("\n🔫 Hunter {0} shoots {1}! {1} is eliminated!", vote_eliminated, shoot_target)
+                        await self._emit("hunter_shot", round_num, hunter=vote_eliminated, target=shoot_target)
+                self._observe_phase("hunter", phase_start)
 
             # ------------------- 胜负判定 -------------------
             # 统计当前存活狼人和平民阵营人数
-            final_alive_players = self.get_alive_players(role_map, eliminated)
-            final_alive_wolves = [p for p in final_alive_players if role_map[p] == "werewolf"]
-            final_alive_good = [p for p in final_alive_players if role_map[p] != "werewolf"]
+            alive_wolves = state.alive_wolves
+            alive_good = state.alive_good
             
-            print(f"\n📊 Current status: Alive wolves: {len(final_alive_wolves)} | Alive good players: {len(final_alive_good)}")
+            log.full("\n📊 Current status: Alive wolves: {} | Alive good players: {}", alive_wolves, alive_good)
             
             # 判定条件1：狼人全部淘汰 → 好人阵营胜利
-            if len(final_alive_wolves) == 0:
-                print(f"\n📢 Moderator:")
-                print("🎉 ===== GAME OVER =====\n🏆 Good players win!")
+            if alive_wolves == 0:
+                log.full("\n📢 Moderator:")
+                log.summary("🎉 ===== GAME OVER =====\n🏆 Good players win! (rounds: {})", round_num)
                 # 更新玩家胜率统计
                 for name, agent in self.player_agents.items():
                     if role_map[name] != "werewolf":  # 好人阵营
@@ -301,12 +485,13 @@ class ModeratorAgent:
                         self.final_stats[name]["wins"] / self.final_stats[name]["total"], 
                         2
                     )
+                winner = "good"
                 game_over = True
             
             # 判定条件2：狼人数 ≥ 好人人数 → 狼人阵营胜利
-            elif len(final_alive_wolves) >= len(final_alive_good):
-                print(f"\n📢 Moderator:")
-                print("🎉 ===== GAME OVER =====\n🏆 Werewolves win!")
+            elif alive_wolves >= alive_good:
+                log.full("\n📢 Moderator:")
+                log.summary("🎉 ===== GAME OVER =====\n🏆 Werewolves win! (rounds: {})", round_num)
                 # 更新玩家胜率统计
                 for name, agent in self.player_agents.items():
                     if role_map[name] == "werewolf":  # 狼人阵营
@@ -320,6 +505,7 @@ class ModeratorAgent:
                         self.final_stats[name]["wins"] / self.final_stats[name]["total"], 
                         2
                     )
+                winner = "werewolf"
                 game_over = True
             
             # ------------------- 智能体策略优化 -------------------
@@ -328,8 +514,8 @@ class ModeratorAgent:
                 if name in votes:  # 该玩家参与了本轮投票
                     vote_target = votes[name]
                     # 判断该玩家是否胜利（用于统计目标胜率）
-                    is_win = (role_map[name] != "werewolf" and len(final_alive_wolves) == 0) or \
-                             (role_map[name] == "werewolf" and len(final_alive_wolves) >= len(final_alive_good))
+                    is_win = (role_map[name] != "werewolf" and alive_wolves == 0) or \
+                             (role_map[name] == "werewolf" and alive_wolves >= alive_good)
                     # 更新玩家历史记录（自学习核心）
                     agent.update_history(vote_target, is_win, role_map)
             
@@ -337,27 +523,49 @@ class ModeratorAgent:
             round_num += 1
 
         # ------------------- 本局总结 -------------------
-        print(f"\n📈 Agent Strategy Optimization Result (Game {self.game_count}):")
-        for name, agent in self.player_agents.items():
-            print(f" - {name}: High-win targets={agent.effective_targets}, Win rate={agent.win_rate}")
-        
-        print(f"\n📢 Moderator:")
-        print("💭 Reflection time: Each player reviews their performance!")
-        # 输出每个玩家的本局表现
-        for name, agent in self.player_agents.items():
-            role = role_map[name].upper()
-            win_flag = "Won" if (role != "WEREWOLF" and len(final_alive_wolves) == 0) or \
-                               (role == "WEREWOLF" and len(final_alive_wolves) >= len(final_alive_good)) else "Lost"
-            print(f"🤔 {name}: Role={role}, Win rate={agent.win_rate}, High-win targets={agent.effective_targets}! Result: {win_flag}")
+        if log.full_enabled:
+            log.full(f"\n📈 Agent Strategy Optimization Result (Game {self.game_count}):")
+            for name, agent in self.player_agents.items():
+                log.full(f" - {name}: High-win targets={list(agent.effective_targets)}, Win rate={agent.win_rate}")
+            
+            log.full(f"\n📢 Moderator:")
+            log.full("💭 Reflection time: Each player reviews their performance!")
+            # 输出每个玩家的本局表现
+            for name, agent in self.player_agents.items():
+                role = role_map[name].upper()
+                win_flag = "Won" if (role != "WEREWOLF" and alive_wolves == 0) or \
+                                   (role == "WEREWOLF" and alive_wolves >= alive_good) else "Lost"
+                log.full(f"🤔 {name}: Role={role}, Win rate={agent.win_rate}, High-win targets={list(agent.effective_targets)}! Result: {win_flag}")
         
+        await self._emit("game_over", round_num - 1, winner=winner, rounds=round_num - 1)
+
+        log.flush()
+
         # 重置所有玩家的本局状态（为下局准备）
         for agent in self.player_agents.values():
             agent.reset_game_state()
 
+        result = {
+            "game": self.game_count,
+            "winner": winner,
+            "rounds": round_num - 1,
+            "roles": role_map,
+            "eliminations": eliminations,
+            "votes": vote_rounds
+        }
+        if self.stats_store is not None:
+            self.stats_store.record_game(result, self.players)
+        if self.metrics is not None:
+            self.metrics.games_total.inc(winner)
+        return result
+
     async def show_final_ranking(self):
-        """展示全局胜率排名：按胜率→胜场数→玩家名排序，带颜色标记（终端可见）"""
-        print(f"\n📊 Final Win Rate Ranking (Total Games: {self.game_count})")
-        print("-" * 60)
+        """展示全局胜率排名：按胜率→胜场数→玩家名排序（summary级别输出，输出到终端时带颜色标记）"""
+        log = self.logger
+        if not log.summary_enabled:
+            return
+        log.summary("\n📊 Final Win Rate Ranking (Total Games: {})", self.game_count)
+        log.summary("-" * 60)
         # 排序：胜率降序 → 胜场数降序 → 玩家名升序
         sorted_players = sorted(
             self.final_stats.items(),
@@ -369,37 +577,138 @@ class ModeratorAgent:
             wins = stats["wins"]
             total = stats["total"]
             
-            # 胜率颜色标记（终端ANSI代码）：高胜率绿色、中等黄色、低胜率红色
-            if win_rate >= 0.8:
+            # 胜率颜色标记（终端ANSI代码）：高胜率绿色、中等黄色、低胜率红色；非终端输出不加颜色
+            if not log.color:
+                rate_str = f"{win_rate:.2f}"
+            elif win_rate >= 0.8:
                 rate_str = f"\033[92m{win_rate:.2f}\033[0m"  # 绿色
             elif win_rate >= 0.5:
                 rate_str = f"\033[93m{win_rate:.2f}\033[0m"  # 黄色
             else:
                 rate_str = f"\033[91m{win_rate:.2f}\033[0m"  # 红色
             
-            print(f" {i:2d}. {name:8s} | Total Games: {total:2d} | Wins: {wins:2d} | Win Rate: {rate_str}")
-        print("-" * 60)
+            low, high = wilson_interval(wins, total)
+            log.summary(f" {i:2d}. {name:8s} | Total Games: {total:2d} | Wins: {wins:2d} | Win Rate: {rate_str} "
+                        f"(95% CI {low:.2f}~{high:.2f})")
+        log.summary("-" * 60)
         
         # 输出详细统计
-        print(f"\n🏆 Final Win Rate Statistics:")
+        log.summary("\n🏆 Final Win Rate Statistics:")
         for name, stats in self.final_stats.items():
-            print(f" - {name}: Total Games={stats['total']}, Wins={stats['wins']}, Win Rate={stats['win_rate']}")
-        print("\n🎮 Game finished! Thanks for playing!")
+            log.summary(f" - {name}: Total Games={stats['total']}, Wins={stats['wins']}, Win Rate={stats['win_rate']}")
+        log.summary("\n🎮 Game finished! Thanks for playing!")
+        log.flush()
 
-    async def run(self):
-        """运行多局游戏：默认运行TOTAL_GAMES局，结束后展示全局排名"""
-        for _ in range(TOTAL_GAMES):
-            await self.run_game()
+    async def run(self, total_games: int = TOTAL_GAMES) -> list:
+        """运行多局游戏：默认运行TOTAL_GAMES局，结束后展示全局排名；返回每局的结构化结果"""
+        results = []
+        for _ in range(total_games):
+            results.append(await self.run_game())
+        if self.stats_store is not None:
+            self.stats_store.flush()  # 写入不足一个批次的剩余计数
         await self.show_final_ranking()
+        return results
+
+    async def run_adaptive(self, max_games: int = 10000, precision: float = 0.02, stop_on: str = "ranking",
+                           min_games: int = None, check_every: int = None, stratified: bool = True,
+                           z: float = Z95) -> dict:
+        """自适应锦标赛：边对局边更新各玩家胜率的Wilson置信区间，统计上已有定论时提前停止
+
+        stop_on："ranking"——排名相邻的玩家置信区间均不重叠（或都已窄于precision，视为并列）时停止；
+                 "precision"——所有玩家的区间半宽都不超过precision时停止
+        check_every：每隔多少局检查一次（默认座位数，分层发牌时即每个轮转块结束时检查）；min_games：最少局数
+        stratified：按stratified_deals轮转发牌，使每个座位均衡地担任每种角色（座位胜率不受发牌运气影响）
+        返回{"results", "games", "stopped"（ranking/precision/max_games）, "intervals"}
+        """
+        if stop_on not in ("ranking", "precision"):
+            raise ValueError("stop_on必须是ranking或precision")
+        check_every = check_every or len(self.players)
+        min_games = min_games if min_games is not None else check_every
+        deals = self.stratified_deals() if stratified else None
+        results = []
+        stopped = "max_games"
+        cis = intervals(self.final_stats, z)
+        while len(results) < max_games:
+            results.append(await self.run_game(roles=next(deals) if deals is not None else None))
+            played = len(results)
+            if played < min_games or played % check_every:
+                continue
+            cis = intervals(self.final_stats, z)
+            if stop_on == "precision" and max_half_width(cis) <= precision or \
+                    stop_on == "ranking" and ranking_settled(self.final_stats, cis, precision):
+                stopped = stop_on
+                break
+        else:
+            cis = intervals(self.final_stats, z)
+        if self.stats_store is not None:
+            self.stats_store.flush()
+        self.logger.summary("\n⏹️ Stopped after {} games ({})", len(results), stopped)
+        await self.show_final_ranking()
+        return {"results": results, "games": len(results), "stopped": stopped, "intervals": cis}
 
 
 # 本地运行入口（直接执行game.py时触发，Vercel部署时不执行）
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="九人制狼人杀多智能体对局")
+    parser.add_argument("--games", type=int, default=TOTAL_GAMES, help="对局数量")
+    parser.add_argument("--quiet", action="store_true", help="无头模式：不输出对局日志，仅汇报吞吐量")
+    parser.add_argument("--log-level", choices=["silent", "summary", "full"], default="full",
+                        help="日志级别：silent不输出；summary只输出每局结局与最终排名；full输出完整对局记录")
+    parser.add_argument("--players", type=int, default=TOTAL_PLAYERS, help="桌大小（角色按make_role_config生成）")
+    parser.add_argument("--decision-timeout", type=float, default=None, help="单个智能体单次决策的超时秒数")
+    parser.add_argument("--stats-db", default=None, help="把每局胜负写入该SQLite统计库（stats_store.py）")
+    parser.add_argument("--planner-rollouts", type=int, default=0,
+                        help="启用蒙特卡洛推演规划器：每次刀人/投票决策的推演局数（0为规则策略）")
+    parser.add_argument("--planner-time-limit", type=float, default=0.05, help="推演规划器单次决策时限（秒）")
+    parser.add_argument("--planner-workers", type=int, default=0, help="推演规划器的并行进程数")
+    parser.add_argument("--decision-cache", type=int, default=0, help="推演结果LRU缓存容量（0为不缓存）")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="自适应锦标赛：--games为最多局数，胜率置信区间有定论时提前停止（分层轮转发牌）")
+    parser.add_argument("--precision", type=float, default=0.02, help="自适应锦标赛的目标精度（置信区间半宽）")
+    parser.add_argument("--stop-on", choices=["ranking", "precision"], default="ranking", help="自适应锦标赛的停止条件")
+    parser.add_argument("--seed", type=int, default=None, help="主随机种子（每局/每个智能体派生独立随机数流，结果可复现）")
+    parser.add_argument("--event-log", default=None, help="追加写入紧凑事件日志（.gz结尾时gzip压缩），可用eventlog.py回放")
+    args = parser.parse_args()
+
     # Windows系统异步事件循环兼容（解决本地运行报错）
     try:
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
     except:
         pass
     # 初始化主持人并启动游戏
-    moderator = ModeratorAgent()
-    asyncio.run(moderator.run())
\ No newline at end of file
+    event_log = None
+    if args.event_log:
+        from eventlog import EventLogWriter
+        event_log = EventLogWriter(args.event_log)
+    stats_store = None
+    if args.stats_db:
+        from stats_store import StatsStore
+        stats_store = StatsStore(args.stats_db)
+    planner = None
+    if args.planner_rollouts > 0:
+        from planner import RolloutPlanner
+        planner = RolloutPlanner(args.planner_rollouts, args.planner_time_limit, args.planner_workers)
+    decision_cache = None
+    if args.decision_cache > 0:
+        from decision_cache import DecisionCache
+        decision_cache = DecisionCache(args.decision_cache)
+    moderator = ModeratorAgent(quiet=args.quiet, log_level=args.log_level, num_players=args.players, decision_timeout=args.decision_timeout,
+                               event_sink=event_log, stats_store=stats_store, seed=args.seed, agent_kwargs={"planner": planner, "decision_cache": decision_cache})
+    start = time.perf_counter()
+    if args.adaptive:
+        results = asyncio.run(moderator.run_adaptive(args.games, args.precision, args.stop_on))["results"]
+    else:
+        results = asyncio.run(moderator.run(args.games))
+    elapsed = time.perf_counter() - start
+    if event_log is not None:
+        event_log.close()
+    if stats_store is not None:
+        stats_store.close()
+    if planner is not None:
+        planner.close()
+    if args.quiet:
+        good_wins = sum(1 for r in results if r["winner"] == "good")
+        print(f"Games: {len(results)} | Good wins: {good_wins} | Werewolf wins: {len(results) - good_wins}")
+        print(f"Elapsed: {elapsed:.2f}s | Throughput: {len(results) / max(elapsed, 1e-9):.1f} games/sec")
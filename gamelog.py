@@ -0,0 +1,57 @@
+import sys
+
+# 日志级别：silent不输出；summary只输出每局开局/结局与最终排名；full输出完整对局记录
+SILENT, SUMMARY, FULL = 0, 1, 2
+LEVELS = {"silent": SILENT, "summary": SUMMARY, "full": FULL}
+
+
+class GameLogger:
+    """分级、延迟格式化、批量写出的对局日志
+
+    summary()/full()接收str.format风格的模板和参数，只有该级别启用时才格式化；
+    大段输出（如逐票详情）先判断summary_enabled/full_enabled再组装。
+    文本先进入缓冲区，满buffer_lines行或调用flush()时一次性写出
+    """
+
+    def __init__(self, level=FULL, stream=None, buffer_lines: int = 256, color: bool = None):
+        self.level = LEVELS[level] if isinstance(level, str) else level
+        if self.level not in LEVELS.values():
+            raise ValueError(f"level必须是{tuple(LEVELS)}之一")
+        self.stream = stream
+        self.buffer_lines = buffer_lines
+        self.summary_enabled = self.level >= SUMMARY
+        self.full_enabled = self.level >= FULL
+        self._color = color
+        self._buffer = []
+
+    @property
+    def color(self) -> bool:
+        """是否输出ANSI颜色：默认只在终端中启用"""
+        if self._color is None:
+            isatty = getattr(self._out(), "isatty", None)
+            self._color = bool(isatty and isatty())
+        return self._color
+
+    def _out(self):
+        # 每次写出时再取sys.stdout，兼容运行期间被重定向的标准输出
+        return self.stream or sys.stdout
+
+    def _write(self, text: str) -> None:
+        self._buffer.append(text)
+        if len(self._buffer) >= self.buffer_lines:
+            self.flush()
+
+    def summary(self, template: str = "", *args) -> None:
+        if self.summary_enabled:
+            self._write(template.format(*args) if args else template)
+
+    def full(self, template: str = "", *args) -> None:
+        if self.full_enabled:
+            self._write(template.format(*args) if args else template)
+
+    def flush(self) -> None:
+        if self._buffer:
+            out = self._out()
+            out.write("\n".join(self._buffer) + "\n")
+            out.flush()
+            self._buffer = []
@@ -1,5 +1,5 @@
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse  # 替换为HTML响应，优化排版
+from fastapi import FastAPI, Query
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse  # 替换为HTML响应，优化排版
 import io
 import sys
 
@@ -109,6 +109,20 @@ def root():
     """
     return formatted_html
 
+# 流式接口：边跑边推送真实对局（game.ModeratorAgent）的事件，format=ndjson（默认）或sse
+@app.get("/stream")
+async def stream(games: int = Query(1, ge=1, le=100000), fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$")):
+    from metrics import GAME_METRICS
+    from streaming import MEDIA_TYPES, stream_lines  # 延迟导入：只有流式接口需要加载对局引擎
+    return StreamingResponse(stream_lines(games, fmt, {"metrics": GAME_METRICS}, threaded=True),
+                             media_type=MEDIA_TYPES[fmt], headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Prometheus指标接口：/stream对局的各阶段/单次决策耗时
+@app.get("/metrics")
+def prometheus_metrics():
+    from metrics import CONTENT_TYPE, REGISTRY
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 # 本地运行Web服务（Vercel会自动处理）
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,80 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+
+class VoteMemory:
+    """紧凑的跨局投票记忆：目标存为玩家下标（类型化数组），可选滑动窗口（环形缓冲，写满后覆盖最旧记录）"""
+
+    WIN = 1   # 标志位：该次投票所在阵营获胜
+    WOLF = 2  # 标志位：投票时身份为狼人
+
+    def __init__(self, players: List[str], window: Optional[int] = None):
+        if window is not None and window <= 0:
+            raise ValueError("window必须为正整数")
+        self.players = list(players)
+        self.index = {p: i for i, p in enumerate(self.players)}
+        self.window = window
+        self.targets = array("H")  # 目标玩家下标
+        self.flags = array("B")    # 胜负/狼人标志位
+        self._head = 0             # 窗口写满后下一次覆盖的位置
+        self.appended = 0          # 累计追加次数（单调递增，供增量快照判断新增了哪些记录）
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    def append(self, target: str, win: bool, wolf: bool = False) -> Optional[Tuple[str, bool]]:
+        """追加一条记录；窗口已满时覆盖最旧记录并返回被淘汰的(目标, 是否胜利)"""
+        code = self.index[target]
+        flag = (self.WIN if win else 0) | (self.WOLF if wolf else 0)
+        self.appended += 1
+        if self.window is None or len(self.targets) < self.window:
+            self.targets.append(code)
+            self.flags.append(flag)
+            return None
+        pos = self._head
+        evicted = (self.players[self.targets[pos]], bool(self.flags[pos] & self.WIN))
+        self.targets[pos] = code
+        self.flags[pos] = flag
+        self._head = (pos + 1) % self.window
+        return evicted
+
+    def __iter__(self):
+        """按时间顺序遍历：(目标, 是否胜利, 是否狼人投票)"""
+        n = len(self.targets)
+        for k in range(n):
+            pos = (self._head + k) % n
+            flag = self.flags[pos]
+            yield self.players[self.targets[pos]], bool(flag & self.WIN), bool(flag & self.WOLF)
+
+    def tail(self, count: int) -> Tuple[array, array]:
+        """按时间顺序取最近count条记录的(目标下标数组, 标志位数组)"""
+        n = len(self.targets)
+        count = min(count, n)
+        if self.window is None or n < self.window or self._head == 0:
+            return self.targets[n - count:], self.flags[n - count:]
+        # 环形缓冲：时间顺序为[_head:] + [:_head]
+        targets = self.targets[self._head:] + self.targets[:self._head]
+        flags = self.flags[self._head:] + self.flags[:self._head]
+        return targets[n - count:], flags[n - count:]
+
+    def extend_codes(self, targets, flags) -> None:
+        """按时间顺序批量追加（目标下标+标志位），等价于逐条append；无窗口时直接整段拷贝"""
+        if self.window is None:
+            self.targets.extend(targets)
+            self.flags.extend(flags)
+            self.appended += len(targets)
+            return
+        for code, flag in zip(targets, flags):
+            self.append(self.players[code], bool(flag & self.WIN), bool(flag & self.WOLF))
+
+    def records(self) -> List[Dict[str, object]]:
+        """导出为记录列表[{"target", "win", "wolf"}]（兼容旧版state_dict格式）"""
+        return [{"target": target, "win": win, "wolf": wolf} for target, win, wolf in self]
+
+    def wolf_targets(self) -> List[str]:
+        """狼人身份时的投票目标列表"""
+        return [target for target, _, wolf in self if wolf]
+
+    def nbytes(self) -> int:
+        """记录数组占用的字节数"""
+        return self.targets.itemsize * len(self.targets) + self.flags.itemsize * len(self.flags)
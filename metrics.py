@@ -0,0 +1,158 @@
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, Tuple
+
+# 默认耗时分桶（秒）：覆盖规则型智能体的微秒级决策到大模型智能体的数十秒调用
+DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+# 对局阶段（与ModeratorAgent.run_game中的计时点一致）
+PHASES = ("wolf_discussion", "wolf_vote", "witch", "seer", "last_words", "day_vote", "hunter")
+
+
+def _label_text(labelnames: Tuple[str, ...], labels: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{k}="{v}"' for k, v in zip(labelnames, labels)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """单调递增计数器：{标签值元组: 计数}"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def snapshot(self) -> dict:
+        return {"|".join(k): v for k, v in self.values.items()}
+
+    def merge(self, snapshot: dict) -> None:
+        for key, value in snapshot.items():
+            labels = tuple(key.split("|")) if key else ()
+            self.values[labels] = self.values.get(labels, 0) + value
+
+    def render(self) -> list:
+        return [f"{self.name}{_label_text(self.labelnames, k)} {v}" for k, v in self.values.items()]
+
+
+class Histogram:
+    """固定分桶直方图：每组标签维护[各桶计数（非累计）, 总和, 总数]，输出时换算为Prometheus累计桶"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def snapshot(self) -> dict:
+        return {"|".join(k): [list(counts), total, count] for k, (counts, total, count) in self.values.items()}
+
+    def merge(self, snapshot: dict) -> None:
+        for key, (counts, total, count) in snapshot.items():
+            labels = tuple(key.split("|")) if key else ()
+            series = self.values.get(labels)
+            if series is None:
+                series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0] = [a + b for a, b in zip(series[0], counts)]
+            series[1] += total
+            series[2] += count
+
+    def render(self) -> list:
+        lines = []
+        for labels, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表：按名字登记计数器/直方图，输出Prometheus文本格式"""
+
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+
+    def _register(self, metric):
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def snapshot(self) -> dict:
+        """可序列化（可跨进程传递）的指标快照"""
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def merge(self, snapshot: dict) -> None:
+        """合并其他进程的指标快照（只合并本注册表中已登记的指标）"""
+        for name, values in snapshot.items():
+            metric = self.metrics.get(name)
+            if metric is not None:
+                metric.merge(values)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class GameMetrics:
+    """对局指标：各阶段耗时、单次决策耗时（按角色/动作类型）、对局数、决策超时数
+
+    ModeratorAgent(metrics=GameMetrics())启用；未启用时run_game只多几次perf_counter调用
+    """
+
+    def __init__(self, registry: MetricsRegistry = None):
+        self.registry = registry or MetricsRegistry()
+        self.phase_seconds = self.registry.histogram(
+            "werewolf_phase_seconds", "Time spent in each game phase", ("phase",))
+        self.decision_seconds = self.registry.histogram(
+            "werewolf_decision_seconds", "Latency of a single agent decision", ("role", "action_type"))
+        self.games_total = self.registry.counter("werewolf_games_total", "Finished games", ("winner",))
+        self.timeouts_total = self.registry.counter(
+            "werewolf_decision_timeouts_total", "Agent decisions that hit the decision timeout")
+
+    def observe_phase(self, phase: str, start: float) -> None:
+        """记录从start（time.perf_counter()）到现在的阶段耗时"""
+        self.phase_seconds.observe(time.perf_counter() - start, phase)
+
+    def observe_decision(self, role: str, action_type: str, start: float) -> None:
+        self.decision_seconds.observe(time.perf_counter() - start, role or "unknown", action_type)
+
+
+# 进程级默认注册表与对局指标（FastAPI应用的/metrics读取这里）
+REGISTRY = MetricsRegistry()
+GAME_METRICS = GameMetrics(REGISTRY)
+CONTENT_TYPE = "text/plain; version=0.0.4"  # PlainTextResponse会自动追加charset
@@ -0,0 +1,181 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+
+from batch_sim import GOOD_WIN, ROLE_CODES, WOLF_WIN, play_out
+from state import GameState
+
+# 决策阶段：night为狼人夜间刀人（候选被刀后从女巫阶段继续），day为白天投票（候选被投出后从猎人开枪继续）
+PHASES = ("night", "day")
+
+
+def rollout_wins(roles: np.ndarray, alive: np.ndarray, resurrect_used: bool, poison_used: bool, phase: str,
+                 candidates: np.ndarray, per_candidate: int, wolf_camp: bool, seed) -> np.ndarray:
+    """对每个候选目标各模拟per_candidate局后续对局，返回各候选下本方阵营的胜场数（可在进程池中运行）"""
+    rng = np.random.default_rng(seed)
+    g = len(candidates) * per_candidate
+    targets = np.repeat(candidates, per_candidate)
+    forced = {"kill": targets} if phase == "night" else {"eliminate": targets}
+    winner, _ = play_out(rng, np.tile(roles, (g, 1)), np.tile(alive, (g, 1)),
+                         np.full(g, resurrect_used), np.full(g, poison_used), **forced)
+    wins = winner == (WOLF_WIN if wolf_camp else GOOD_WIN)
+    return wins.reshape(len(candidates), per_candidate).sum(axis=1)
+
+
+class RolloutPlanner:
+    """蒙特卡洛推演选目标：从当前局面出发，对每个候选目标用batch_sim的向量化规则策略模拟后续对局，选本方胜率最高者
+
+    rollouts：每次决策的推演总局数（在候选间平均分配）；time_limit：单次决策的推演时限（秒，None为不限；
+    至少完成一批推演）；workers：>0时用该数量的进程并行推演；chunk：每批每个候选的推演局数；seed：推演随机种子；
+    roles：使用推演的角色（None为所有角色，其余角色仍走规则策略）
+    用法：PlayerAgent(name, planner=RolloutPlanner(rollouts=512, time_limit=0.05))，多个智能体可共享同一个planner
+    """
+
+    def __init__(self, rollouts: int = 512, time_limit: Optional[float] = 0.05, workers: int = 0, chunk: int = 64,
+                 seed: int = None, roles: tuple = None):
+        if rollouts < 1 or chunk < 1:
+            raise ValueError("rollouts与chunk必须为正整数")
+        self.rollouts = rollouts
+        self.time_limit = time_limit
+        self.workers = workers
+        self.chunk = chunk
+        self.roles = None if roles is None else frozenset(roles)
+        self.rng = np.random.default_rng(seed)
+        self.executor = None  # 进程池（首次并行推演时创建）
+        self.stats = {"decisions": 0, "rollouts": 0, "timeouts": 0, "seconds": 0.0}
+        self.last_win_rate = None  # 最近一次决策选中目标的推演胜率（0~1）
+
+    def plays(self, role: str) -> bool:
+        """该角色是否使用推演决策"""
+        return self.roles is None or role in self.roles
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def encode(state: GameState) -> tuple:
+        """局面编码为(角色码数组, 存活布尔数组)"""
+        roles = np.array([ROLE_CODES.get(r, ROLE_CODES["villager"]) for r in state.roles], dtype=np.int8)
+        alive = np.array([bool(state.alive >> i & 1) for i in range(len(state.players))], dtype=bool)
+        return roles, alive
+
+    async def evaluate(self, state: GameState, candidates: list, wolf_camp: bool, phase: str = "day",
+                       witch_used: Dict[str, bool] = None) -> tuple:
+        """推演各候选座位，返回(各候选胜场数, 各候选推演局数)；在预算用完或超过时限时停止
+
+        推演在线程（workers=0）或进程池中运行，等待期间不阻塞事件循环，可被decision_timeout取消
+        witch_used：女巫的用药情况（只有女巫本人知道，其他角色按未使用处理）
+        """
+        if phase not in PHASES:
+            raise ValueError(f"phase必须是{PHASES}之一")
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        deadline = None if self.time_limit is None else start + self.time_limit
+        roles, alive = self.encode(state)
+        witch_used = witch_used or {}
+        args = (roles, alive, bool(witch_used.get("resurrect")), bool(witch_used.get("poison")), phase,
+                np.asarray(candidates))
+        budget = max(self.rollouts // len(candidates), 1)
+        # 每批局数：最后一批只补足预算余数；各批种子在首次等待前一次取完，并发决策交错时随机数流仍可复现
+        sizes = [self.chunk] * (budget // self.chunk) + ([budget % self.chunk] if budget % self.chunk else [])
+        seeds = self.rng.integers(2 ** 63, size=len(sizes))
+        wins = np.zeros(len(candidates), dtype=np.int64)
+        runs = 0
+        if self.workers > 0:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            pending = {}
+            for size, seed in zip(sizes, seeds):
+                future = loop.run_in_executor(self.executor, rollout_wins, *args, size, wolf_camp, int(seed))
+                pending[future] = size
+            try:
+                while pending:
+                    # 时限已过但一批都未完成时不再带超时轮询（timeout=0会空转），等到第一批完成为止
+                    timeout = None if deadline is None or not runs else max(deadline - time.perf_counter(), 0)
+                    done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        wins += future.result()
+                        runs += pending.pop(future)
+                    if pending and deadline is not None and time.perf_counter() >= deadline:
+                        self.stats["timeouts"] += 1
+                        break
+            finally:
+                for future in pending:
+                    future.cancel()  # 超时或决策被取消：未开始的批次不再运行
+        else:
+            for i, (size, seed) in enumerate(zip(sizes, seeds)):
+                if i and deadline is not None and time.perf_counter() >= deadline:
+                    self.stats["timeouts"] += 1
+                    break
+                wins += await loop.run_in_executor(None, rollout_wins, *args, size, wolf_camp, int(seed))
+                runs += size
+        self.stats["decisions"] += 1
+        self.stats["rollouts"] += runs * len(candidates)
+        self.stats["seconds"] += time.perf_counter() - start
+        return wins, runs
+
+    async def choose(self, state: GameState, mask: int, wolf_camp: bool, phase: str = "day",
+                     witch_used: Dict[str, bool] = None) -> Optional[str]:
+        """在位掩码mask的候选中选推演胜率最高的玩家名（平局取座位靠前者）；无候选时返回None"""
+        candidates = state.seats(mask)
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            self.last_win_rate = None
+            return state.players[candidates[0]]
+        wins, runs = await self.evaluate(state, candidates, wolf_camp, phase, witch_used)
+        best = int(wins.argmax())
+        self.last_win_rate = wins[best] / runs
+        return state.players[candidates[best]]
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+
+    from decision_cache import DecisionCache
+    from game import ModeratorAgent
+
+    parser = argparse.ArgumentParser(description="蒙特卡洛推演智能体 vs 规则型智能体")
+    parser.add_argument("--games", type=int, default=200, help="对局数量")
+    parser.add_argument("--rollouts", type=int, default=512, help="每次决策的推演局数")
+    parser.add_argument("--time-limit", type=float, default=0.05, help="单次决策推演时限（秒）")
+    parser.add_argument("--workers", type=int, default=0, help="并行推演进程数（0为在当前进程推演）")
+    parser.add_argument("--camp", choices=["werewolf", "good"], default="werewolf", help="使用推演的阵营")
+    parser.add_argument("--players", type=int, default=None, help="桌大小（默认九人局）")
+    parser.add_argument("--cache-size", type=int, default=0, help="推演结果LRU缓存容量（0为不缓存）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    camp_roles = ("werewolf",) if args.camp == "werewolf" else ("villager", "seer", "witch", "hunter")
+    for label, use_planner in (("baseline", False), ("planner", True)):
+        random.seed(args.seed)
+        planner = RolloutPlanner(args.rollouts, args.time_limit, args.workers, seed=args.seed,
+                                 roles=camp_roles) if use_planner else None
+        cache = DecisionCache(args.cache_size) if use_planner and args.cache_size > 0 else None
+        moderator = ModeratorAgent(quiet=True, num_players=args.players,
+                                   agent_kwargs={"planner": planner, "decision_cache": cache})
+        start = time.perf_counter()
+        games = asyncio.run(moderator.run(args.games))
+        elapsed = time.perf_counter() - start
+        win_rate = sum(1 for r in games if r["winner"] == args.camp) / max(len(games), 1)
+        line = f"{label:<9} {args.camp} win rate={win_rate:.3f} | {len(games) / max(elapsed, 1e-9):.1f} games/sec"
+        if planner is not None:
+            per_decision = planner.stats["seconds"] / max(planner.stats["decisions"], 1) * 1000
+            line += f" | {planner.stats['decisions']} decisions, {per_decision:.2f} ms/decision, " \
+                    f"{planner.stats['timeouts']} hit time limit"
+            if cache is not None:
+                line += f" | cache hit rate={cache.stats()['hit_rate']:.1%}"
+            planner.close()
+        print(line)
@@ -0,0 +1,13 @@
+import hashlib
+import random
+
+
+def derive_seed(master_seed, *keys) -> int:
+    """由主种子和一组键（如局号、"agent"、玩家名）派生64位子种子：与进程、PYTHONHASHSEED、派生顺序无关"""
+    text = "/".join(str(k) for k in (master_seed,) + keys)
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def stream(master_seed, *keys) -> random.Random:
+    """派生一条独立的随机数流（random.Random实例）"""
+    return random.Random(derive_seed(master_seed, *keys))
@@ -0,0 +1,123 @@
+import copy
+import random
+from typing import Dict, Iterable, List, Optional, Tuple
+
+KEY_ROLES = ("seer", "hunter", "witch")  # 神职（好人阵营关键角色）
+# 九人制标准角色配置（game.py与batch_sim.py共用；放在这里使NumPy批量引擎不依赖agentscope）
+ROLE_CONFIG = {
+    "werewolf": 3,    # 3狼人
+    "seer": 1,        # 1预言家
+    "witch": 1,       # 1女巫
+    "hunter": 1,      # 1猎人
+    "villager": 3     # 3平民
+}
+
+
+class GameState:
+    """对局核心状态：整数座位号 + 存活位掩码 + 阵营/角色位掩码
+
+    座位i对应第i位；存活判定、阵营筛选均为位运算，玩家名只在日志和Msg边界转换
+    """
+
+    def __init__(self, players: List[str], role_map: Dict[str, str]):
+        self.players = list(players)                            # 座位号 -> 玩家名
+        self.seat = {p: i for i, p in enumerate(self.players)}  # 玩家名 -> 座位号
+        self.roles = [role_map.get(p) for p in self.players]    # 座位号 -> 角色
+        self.full_mask = (1 << len(self.players)) - 1
+        self.role_masks: Dict[str, int] = {}
+        for i, role in enumerate(self.roles):
+            if role is not None:
+                self.role_masks[role] = self.role_masks.get(role, 0) | (1 << i)
+        self.wolf_mask = self.role_masks.get("werewolf", 0)
+        self.assigned_mask = 0
+        for mask in self.role_masks.values():
+            self.assigned_mask |= mask
+        self.good_mask = self.assigned_mask & ~self.wolf_mask
+        self.key_good_mask = 0
+        for role in KEY_ROLES:
+            self.key_good_mask |= self.role_masks.get(role, 0)
+        self.alive = self.assigned_mask  # 只有分配了角色的座位参与对局
+        # 掩码 -> 玩家名元组的缓存（纯函数结果，本局内所有快照共享；用元组使调用方无法原地修改缓存）
+        self._names_cache: Dict[int, Tuple[str, ...]] = {}
+
+    def snapshot(self) -> "GameState":
+        """浅拷贝：共享座位/角色等静态表，仅存活掩码独立（用于每轮开始时的存活快照）"""
+        return copy.copy(self)
+
+    # ---------- 名字 <-> 位掩码 ----------
+    def bit(self, name: str) -> int:
+        seat = self.seat.get(name)
+        return 0 if seat is None else 1 << seat
+
+    def mask_of(self, names: Iterable[str]) -> int:
+        mask = 0
+        for name in names:
+            mask |= self.bit(name)
+        return mask
+
+    def seats(self, mask: int) -> List[int]:
+        """按座位顺序列出掩码中的座位号"""
+        out = []
+        while mask:
+            low = mask & -mask
+            out.append(low.bit_length() - 1)
+            mask ^= low
+        return out
+
+    def names(self, mask: int) -> Tuple[str, ...]:
+        """按座位顺序列出掩码中的玩家名（不可变元组，在本局内缓存共享）"""
+        names = self._names_cache.get(mask)
+        if names is None:
+            names = self._names_cache[mask] = tuple(self.players[i] for i in self.seats(mask))
+        return names
+
+    def pick(self, mask: int, exclude: int = 0, rng=random) -> str:
+        """在mask中（排除exclude位）均匀随机选一名玩家
+
+        直接复用整个mask的缓存列表并跳过被排除的座位，避免为每个调用者单独构建候选列表；
+        随机数消耗与对同序候选列表调用random.choice一致
+        """
+        base = mask | exclude
+        names = self.names(base)
+        if not exclude & base:
+            return rng.choice(names)
+        skip = (base & (exclude - 1)).bit_count()  # 被排除座位在列表中的位置（exclude为单个座位位）
+        i = rng.choice(range(len(names) - 1))
+        return names[i if i < skip else i + 1]
+
+    @staticmethod
+    def count(mask: int) -> int:
+        return mask.bit_count()
+
+    # ---------- 存活状态 ----------
+    def is_alive(self, name: str) -> bool:
+        return bool(self.alive & self.bit(name))
+
+    def kill(self, name: str) -> bool:
+        """标记淘汰，返回该玩家此前是否存活"""
+        bit = self.bit(name)
+        was_alive = bool(self.alive & bit)
+        self.alive &= ~bit
+        return was_alive
+
+    def revive(self, name: str) -> None:
+        self.alive |= self.bit(name) & self.assigned_mask
+
+    def role_of(self, name: str) -> Optional[str]:
+        seat = self.seat.get(name)
+        return None if seat is None else self.roles[seat]
+
+    def alive_names(self) -> Tuple[str, ...]:
+        return self.names(self.alive)
+
+    def alive_of(self, role: str) -> Tuple[str, ...]:
+        """某角色的存活玩家名"""
+        return self.names(self.alive & self.role_masks.get(role, 0))
+
+    @property
+    def alive_wolves(self) -> int:
+        return self.count(self.alive & self.wolf_mask)
+
+    @property
+    def alive_good(self) -> int:
+        return self.count(self.alive & self.good_mask)
@@ -0,0 +1,201 @@
+import os
+import sqlite3
+import tempfile
+from collections import Counter
+
+# 聚合计数表：每行只存(局数, 胜场)，查询代价与已记录的对局数无关
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS player_stats (
+    player TEXT PRIMARY KEY, games INTEGER NOT NULL DEFAULT 0, wins INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS role_stats (
+    role TEXT PRIMARY KEY, games INTEGER NOT NULL DEFAULT 0, wins INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS seat_stats (
+    seat INTEGER NOT NULL, role TEXT NOT NULL, games INTEGER NOT NULL DEFAULT 0, wins INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (seat, role)
+);
+CREATE TABLE IF NOT EXISTS player_role_stats (
+    player TEXT NOT NULL, role TEXT NOT NULL, games INTEGER NOT NULL DEFAULT 0, wins INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (player, role)
+);
+CREATE TABLE IF NOT EXISTS game_totals (
+    winner TEXT PRIMARY KEY, games INTEGER NOT NULL DEFAULT 0, rounds INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_player_win_rate ON player_stats ((wins * 1.0 / games) DESC, wins DESC);
+CREATE INDEX IF NOT EXISTS idx_player_role_win_rate ON player_role_stats (role, (wins * 1.0 / games) DESC);
+CREATE INDEX IF NOT EXISTS idx_seat_role ON seat_stats (role, seat);
+"""
+
+UPSERT = "INSERT INTO {table} ({keys}, games, wins) VALUES ({marks}, ?, ?) " \
+         "ON CONFLICT ({keys}) DO UPDATE SET games = games + excluded.games, wins = wins + excluded.wins"
+
+
+def default_db_path() -> str:
+    """默认数据库路径：环境变量WEREWOLF_STATS_DB，否则为系统临时目录（Vercel只有/tmp可写）"""
+    return os.environ.get("WEREWOLF_STATS_DB") or os.path.join(tempfile.gettempdir(), "werewolf_stats.db")
+
+
+class StatsStore:
+    """SQLite持久化胜率统计：玩家/角色/座位×角色/玩家×角色四张聚合表
+
+    record_game只在内存中累加计数，每batch_size局在一个事务里批量upsert写入；
+    结束时调用flush()/close()（或用with语句）写入剩余计数
+    """
+
+    def __init__(self, path: str = None, batch_size: int = 1000):
+        self.path = path or default_db_path()
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")  # 多进程写入时读者不被阻塞
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._reset_pending()
+
+    @classmethod
+    def reader(cls, path: str = None) -> "StatsStore":
+        """只读实例：不执行PRAGMA/建表，只能调用查询方法；连接可跨线程使用（调用方需保证同一时刻只有一个线程查询）
+
+        数据库文件不存在时先按正常方式建表一次
+        """
+        store = cls.__new__(cls)
+        store.path = path or default_db_path()
+        store.batch_size = 0
+        if not os.path.exists(store.path):
+            cls(store.path).close()
+        store.conn = sqlite3.connect(f"file:{store.path}?mode=ro", uri=True, timeout=30, check_same_thread=False)
+        store._reset_pending()
+        return store
+
+    def _reset_pending(self) -> None:
+        # 待写入的增量：{键: [局数, 胜场]}
+        self.pending_games = 0
+        self.players = {}
+        self.roles = {}
+        self.seats = {}
+        self.player_roles = {}
+        self.totals = Counter()
+
+    @staticmethod
+    def _add(table: dict, key, win: bool) -> None:
+        counts = table.get(key)
+        if counts is None:
+            counts = table[key] = [0, 0]
+        counts[0] += 1
+        counts[1] += win
+
+    def record_game(self, result: dict, players: list = None) -> None:
+        """记录一局（ModeratorAgent.run_game的返回值）；players为座位表，默认按roles的键顺序"""
+        winner = result["winner"]
+        roles = result["roles"]
+        for seat, player in enumerate(players or roles):
+            role = roles[player]
+            win = (role == "werewolf") == (winner == "werewolf")
+            self._add(self.players, player, win)
+            self._add(self.roles, role, win)
+            self._add(self.seats, (seat, role), win)
+            self._add(self.player_roles, (player, role), win)
+        self.totals[(winner, "games")] += 1
+        self.totals[(winner, "rounds")] += result["rounds"]
+        self.pending_games += 1
+        if self.pending_games >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """把内存中的增量在一个事务里写入数据库"""
+        if not self.pending_games:
+            return
+        tables = (
+            ("player_stats", ("player",), {(k,): v for k, v in self.players.items()}),
+            ("role_stats", ("role",), {(k,): v for k, v in self.roles.items()}),
+            ("seat_stats", ("seat", "role"), self.seats),
+            ("player_role_stats", ("player", "role"), self.player_roles)
+        )
+        winners = {w for w, _ in self.totals}
+        with self.conn:
+            for table, keys, counts in tables:
+                sql = UPSERT.format(table=table, keys=", ".join(keys), marks=", ".join("?" * len(keys)))
+                self.conn.executemany(sql, [(*key, games, wins) for key, (games, wins) in counts.items()])
+            self.conn.executemany(
+                "INSERT INTO game_totals (winner, games, rounds) VALUES (?, ?, ?) ON CONFLICT (winner) "
+                "DO UPDATE SET games = games + excluded.games, rounds = rounds + excluded.rounds",
+                [(w, self.totals[(w, "games")], self.totals[(w, "rounds")]) for w in winners]
+            )
+        self._reset_pending()
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- 查询（只读聚合表，毫秒级） ----------
+    def _rows(self, sql: str, params: tuple = ()) -> list:
+        cursor = self.conn.execute(sql, params)
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def total_games(self) -> int:
+        return self.conn.execute("SELECT COALESCE(SUM(games), 0) FROM game_totals").fetchone()[0]
+
+    def winners(self) -> list:
+        return self._rows("SELECT winner, games, ROUND(rounds * 1.0 / games, 3) AS mean_rounds FROM game_totals "
+                          "ORDER BY games DESC")
+
+    def top_players(self, k: int = 10, min_games: int = 1) -> list:
+        """按胜率→胜场数排序的前k名玩家"""
+        return self._rows(
+            "SELECT player, wins AS win_times, games AS total_times, ROUND(wins * 1.0 / games, 4) AS win_rate "
+            "FROM player_stats WHERE games >= ? ORDER BY (wins * 1.0 / games) DESC, wins DESC LIMIT ?",
+            (min_games, k)
+        )
+
+    def role_breakdown(self) -> list:
+        """各角色胜率"""
+        return self._rows("SELECT role, wins AS win_times, games AS total_times, "
+                          "ROUND(wins * 1.0 / games, 4) AS win_rate FROM role_stats ORDER BY role")
+
+    def seat_breakdown(self, role: str = None) -> list:
+        """座位×角色胜率（可只看某个角色）"""
+        sql = "SELECT seat, role, wins AS win_times, games AS total_times, " \
+              "ROUND(wins * 1.0 / games, 4) AS win_rate FROM seat_stats"
+        if role is None:
+            return self._rows(sql + " ORDER BY seat, role")
+        return self._rows(sql + " WHERE role = ? ORDER BY seat", (role,))
+
+    def top_players_by_role(self, role: str, k: int = 10, min_games: int = 1) -> list:
+        """某角色下胜率最高的前k名玩家"""
+        return self._rows(
+            "SELECT player, role, wins AS win_times, games AS total_times, ROUND(wins * 1.0 / games, 4) AS win_rate "
+            "FROM player_role_stats WHERE role = ? AND games >= ? ORDER BY (wins * 1.0 / games) DESC LIMIT ?",
+            (role, min_games, k)
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="查询持久化胜率统计")
+    parser.add_argument("--db", default=None, help="数据库路径（默认WEREWOLF_STATS_DB或临时目录）")
+    parser.add_argument("--top", type=int, default=10, help="胜率排名前k名")
+    parser.add_argument("--role", default=None, help="只看某角色的玩家排名与座位胜率")
+    args = parser.parse_args()
+
+    store = StatsStore(args.db)
+    start = time.perf_counter()
+    report = {
+        "total_games": store.total_games(),
+        "winners": store.winners(),
+        "top_players": store.top_players_by_role(args.role, args.top) if args.role else store.top_players(args.top),
+        "roles": store.role_breakdown(),
+        "seats": store.seat_breakdown(args.role)
+    }
+    report["query_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    store.close()
@@ -0,0 +1,137 @@
+import asyncio
+import contextlib
+import json
+import threading
+
+from game import ModeratorAgent
+from metrics import GameMetrics
+
+STREAM_BUFFER = 256  # 事件缓冲上限：消费端跟不上时对局会在推送事件处等待，服务端内存不随对局长度/局数增长
+STREAM_MEMORY_WINDOW = 1000  # 流式对局中智能体跨局投票记忆的默认窗口（条），使长时间的流内存有上限
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream"
+}
+
+
+def format_ndjson(event: dict) -> str:
+    """一行一个JSON事件"""
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def format_sse(event: dict) -> str:
+    """Server-Sent Events格式：事件类型作为event字段"""
+    return f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+def _bounded(moderator_kwargs: dict = None) -> dict:
+    """补上智能体记忆窗口（调用方未指定memory_window/memory_decay时），返回新的参数字典"""
+    kwargs = dict(moderator_kwargs or {})
+    agent_kwargs = dict(kwargs.get("agent_kwargs") or {})
+    if agent_kwargs.get("memory_window") is None and agent_kwargs.get("memory_decay") is None:
+        agent_kwargs["memory_window"] = STREAM_MEMORY_WINDOW
+    kwargs["agent_kwargs"] = agent_kwargs
+    return kwargs
+
+
+async def stream_events(total_games: int = 1, moderator_kwargs: dict = None, buffer: int = STREAM_BUFFER):
+    """边跑边产出对局事件（异步生成器）：对局在后台任务中运行，事件经有界队列逐个交给调用方
+
+    调用方停止迭代（如客户端断开）时后台对局随之取消。智能体的跨局记忆默认以STREAM_MEMORY_WINDOW为窗口
+    （agent_kwargs中已指定memory_window/memory_decay时按调用方设置），内存不随局数增长
+    """
+    queue = asyncio.Queue(maxsize=buffer)
+    finished = object()  # 结束标记
+    moderator = ModeratorAgent(quiet=True, event_sink=queue.put, **_bounded(moderator_kwargs))
+
+    async def produce():
+        try:
+            # 逐局运行且不保留逐局结果（ModeratorAgent.run会累积结果列表）
+            for _ in range(total_games):
+                await moderator.run_game()
+        finally:
+            await queue.put(finished)
+
+    task = asyncio.create_task(produce())
+    try:
+        while True:
+            event = await queue.get()
+            if event is finished:
+                break
+            yield event
+        await task  # 对局异常在此抛出
+    finally:
+        task.cancel()
+
+
+async def stream_events_threaded(total_games: int = 1, moderator_kwargs: dict = None, buffer: int = STREAM_BUFFER):
+    """同stream_events，但对局在独立线程（线程自己的事件循环）中运行，调用方的事件循环只转发事件：
+    长时间的流不会阻塞同一服务上的其他请求。事件仍经有界队列传递，消费端跟不上时对局线程等待
+
+    moderator_kwargs中的metrics（GameMetrics）只在调用方的事件循环中更新：线程内每局使用独立的指标，该局结束后合并过去；
+    智能体记忆的上限同stream_events
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=buffer)
+    finished = object()  # 结束标记
+    outcome = {}  # 对局线程中的异常（读到结束标记后由调用方抛出）
+    kwargs = _bounded(moderator_kwargs)
+    metrics = kwargs.pop("metrics", None)
+    game_loop = asyncio.new_event_loop()
+
+    async def put(item):
+        # 在调用方的事件循环上入队：队列满时对局线程在此等待（背压）
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(queue.put(item), loop))
+
+    async def produce():
+        try:
+            moderator = ModeratorAgent(quiet=True, event_sink=put, **kwargs)
+            for _ in range(total_games):
+                if metrics is not None:
+                    moderator.metrics = GameMetrics()
+                await moderator.run_game()
+                if metrics is not None:
+                    loop.call_soon_threadsafe(metrics.registry.merge, moderator.metrics.registry.snapshot())
+        except Exception as e:
+            outcome["error"] = e
+        await put(finished)
+
+    task = game_loop.create_task(produce())
+
+    def run():
+        try:
+            game_loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass  # 调用方停止迭代
+        finally:
+            game_loop.run_until_complete(game_loop.shutdown_default_executor())
+            game_loop.close()
+
+    threading.Thread(target=run, name="stream-game", daemon=True).start()
+    try:
+        while True:
+            event = await queue.get()
+            if event is finished:
+                break
+            yield event
+        if "error" in outcome:
+            raise outcome["error"]
+    finally:
+        with contextlib.suppress(RuntimeError):  # 对局线程已结束、事件循环已关闭
+            game_loop.call_soon_threadsafe(task.cancel)
+
+
+async def stream_lines(total_games: int = 1, fmt: str = "ndjson", moderator_kwargs: dict = None,
+                       threaded: bool = False):
+    """按NDJSON或SSE格式逐条产出事件文本，可直接作为StreamingResponse的内容
+
+    threaded：对局在独立线程中运行（stream_events_threaded），服务端事件循环不被对局占用
+    """
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"fmt必须是{tuple(MEDIA_TYPES)}之一")
+    formatter = format_sse if fmt == "sse" else format_ndjson
+    if fmt == "sse":
+        yield "retry: 3000\n\n"  # 首包立即发出，客户端无需等待第一局的第一个事件
+    events = stream_events_threaded if threaded else stream_events
+    async for event in events(total_games, moderator_kwargs):
+        yield formatter(event)
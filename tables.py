@@ -0,0 +1,141 @@
+import asyncio
+import contextlib
+import time
+from collections import OrderedDict, deque
+
+from game import ModeratorAgent
+from seeding import derive_seed
+from tournament import merge_stats, split_games
+
+
+class FairLimiter:
+    """在途智能体调用数上限 + 按桌轮转的公平调度
+
+    名额用完后，各桌的等待者按桌分队列；每释放一个名额，按轮转顺序交给下一张桌的最早等待者，
+    一张桌同时发起的大批决策（如全体投票）不会挤占其他桌。用法：async with limiter.slot(桌): ...
+    """
+
+    def __init__(self, limit: int):
+        if limit < 1:
+            raise ValueError("limit必须为正整数")
+        self.limit = limit
+        self.in_flight = 0
+        self.peak = 0            # 观测到的最大在途调用数
+        self.waits = 0           # 需要排队的调用次数
+        self.waiting = OrderedDict()  # {桌: deque[Future]}，按轮转顺序排列
+
+    async def acquire(self, key) -> None:
+        if self.in_flight < self.limit and not self.waiting:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            return
+        future = asyncio.get_running_loop().create_future()
+        self.waiting.setdefault(key, deque()).append(future)
+        self.waits += 1
+        try:
+            await future  # release()直接把名额转交过来（in_flight不变）
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # 名额已转交但调用被取消：归还名额
+            else:
+                queue = self.waiting.get(key)
+                if queue is not None and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self.waiting[key]
+            raise
+
+    def release(self) -> None:
+        while self.waiting:
+            key, queue = next(iter(self.waiting.items()))
+            future = queue.popleft()
+            del self.waiting[key]
+            if queue:
+                self.waiting[key] = queue  # 该桌仍有等待者：移到轮转末尾
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @contextlib.asynccontextmanager
+    async def slot(self, key):
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class TableScheduler:
+    """单个事件循环上并发运行多张独立的对局桌
+
+    每张桌是独立的ModeratorAgent（各自的智能体、统计与随机数流，互不共享状态），所有桌共享一个FairLimiter，
+    限制同时在途的智能体调用数。智能体调用为I/O（如大模型接口）时，吞吐随桌数增长而无需增加进程
+    tables：桌数；max_inflight：在途智能体调用上限；seed：主种子（第i张桌的主种子为derive_seed(seed, "table", i)，
+    每张桌的结果与并发调度顺序无关）；moderator_kwargs：透传给每个ModeratorAgent的参数
+    """
+
+    def __init__(self, tables: int = 64, max_inflight: int = 64, seed: int = None, moderator_kwargs: dict = None):
+        self.limiter = FairLimiter(max_inflight)
+        self.tables = [
+            ModeratorAgent(quiet=True, seed=None if seed is None else derive_seed(seed, "table", i),
+                           call_limiter=self.limiter, **(moderator_kwargs or {}))
+            for i in range(tables)
+        ]
+
+    @staticmethod
+    async def _run_table(moderator: ModeratorAgent, games: int) -> list:
+        return [await moderator.run_game() for _ in range(games)]
+
+    async def run(self, total_games: int) -> dict:
+        """把total_games局尽量均匀地分给各桌并发运行，返回合并后的结果"""
+        chunks = split_games(total_games, len(self.tables))
+        start = time.perf_counter()
+        per_table = await asyncio.gather(*(self._run_table(m, n) for m, n in zip(self.tables, chunks)))
+        elapsed = time.perf_counter() - start
+        for moderator in self.tables:
+            if moderator.stats_store is not None:
+                moderator.stats_store.flush()
+        results = [r for table in per_table for r in table]
+        good_wins = sum(1 for r in results if r["winner"] == "good")
+        return {
+            "games": len(results),
+            "tables": len(chunks),
+            "winners": {"good": good_wins, "werewolf": len(results) - good_wins},
+            "final_stats": merge_stats([m.final_stats for m in self.tables]),
+            "results": per_table,
+            "elapsed": elapsed,
+            "games_per_sec": len(results) / max(elapsed, 1e-9),
+            "peak_inflight": self.limiter.peak,
+            "queued_calls": self.limiter.waits
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from agent import PlayerAgent
+
+    class LatencyAgent(PlayerAgent):
+        """模拟I/O型（大模型驱动）智能体：每次决策前等待固定延迟"""
+
+        latency = 0.01
+
+        async def act(self, *args, **kwargs):
+            await asyncio.sleep(self.latency)
+            return await super().act(*args, **kwargs)
+
+    parser = argparse.ArgumentParser(description="单事件循环多桌并发对局")
+    parser.add_argument("--games", type=int, default=200, help="总对局数")
+    parser.add_argument("--tables", type=int, nargs="+", default=[1, 8, 64], help="桌数（可给多个，逐一对比）")
+    parser.add_argument("--max-inflight", type=int, default=256, help="在途智能体调用上限")
+    parser.add_argument("--latency", type=float, default=0.01, help="每次智能体决策的模拟I/O延迟（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="主随机种子")
+    args = parser.parse_args()
+
+    LatencyAgent.latency = args.latency
+    for tables in args.tables:
+        scheduler = TableScheduler(tables, args.max_inflight, args.seed, {"agent_class": LatencyAgent})
+        out = asyncio.run(scheduler.run(args.games))
+        print(f"{out['tables']:4d} tables: {out['games_per_sec']:8.1f} games/sec ({out['elapsed']:.2f}s) | "
+              f"peak in-flight calls: {out['peak_inflight']}/{args.max_inflight} | queued calls: {out['queued_calls']}")
@@ -0,0 +1,62 @@
+from collections import Counter
+from typing import Dict, List, Optional
+import random
+
+
+class VoteTally:
+    """通用计票器（白天投票、狼人刀人投票等）：一次遍历完成计票，支持加权票与可复现的平票处理
+
+    weights：{投票者: 票权}，未列出的投票者为1票（如警长可设为1.5）
+    tie_break："random"——平票目标中随机选一个（使用rng，传入带种子的random.Random即可复现）；
+               "first"——选最先得票的目标；"none"——平票时无人出局
+    """
+
+    TIE_BREAKS = ("random", "first", "none")
+
+    def __init__(self, weights: Dict[str, float] = None, tie_break: str = "random", rng=None):
+        if tie_break not in self.TIE_BREAKS:
+            raise ValueError(f"tie_break必须是{self.TIE_BREAKS}之一")
+        self.weights = weights or {}
+        self.tie_break = tie_break
+        self.rng = rng or random
+        self.votes: Dict[str, str] = {}  # {投票者: 被投票者}
+        self.counts = Counter()          # {被投票者: 加权票数}，按首次得票顺序
+
+    @classmethod
+    def from_votes(cls, votes: Dict[str, str], **kwargs) -> "VoteTally":
+        tally = cls(**kwargs)
+        for voter, target in votes.items():
+            tally.add(voter, target)
+        return tally
+
+    def add(self, voter: str, target: str) -> None:
+        """记一票；同一投票者重复投票时以最后一次为准"""
+        previous = self.votes.get(voter)
+        weight = self.weights.get(voter, 1)
+        if previous is not None:
+            self.counts[previous] -= weight
+            if not self.counts[previous]:
+                del self.counts[previous]
+        self.votes[voter] = target
+        self.counts[target] += weight
+
+    def count(self, target: str) -> float:
+        return self.counts.get(target, 0)
+
+    def leaders(self) -> List[str]:
+        """最高票目标（按首次得票顺序）"""
+        if not self.counts:
+            return []
+        top = max(self.counts.values())
+        return [t for t, c in self.counts.items() if c == top]
+
+    def winner(self) -> Optional[str]:
+        """按平票策略确定出局者；无人得票或平票策略为none且平票时返回None"""
+        leaders = self.leaders()
+        if len(leaders) <= 1:
+            return leaders[0] if leaders else None
+        if self.tie_break == "random":
+            return self.rng.choice(leaders)
+        if self.tie_break == "first":
+            return leaders[0]
+        return None
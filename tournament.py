@@ -0,0 +1,144 @@
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from game import ModeratorAgent, TOTAL_GAMES
+from metrics import GameMetrics
+from stats_store import StatsStore
+
+
+def play_games(total_games: int, seed: int, keep_results: bool = False, moderator_kwargs: dict = None,
+               stats_db: str = None, collect_metrics: bool = False) -> dict:
+    """进程池工作函数：每个进程持有独立的ModeratorAgent/PlayerAgent，无头运行指定局数
+
+    seed：本进程的主随机种子，每局/每个智能体由它派生独立的随机数流（不读写全局random，结果可复现）
+
+    moderator_kwargs：透传给ModeratorAgent的参数（如num_players/role_config/agent_kwargs）
+    stats_db：SQLite统计库路径，每个进程各自打开连接并批量写入（WAL模式下多进程可并发写）
+    collect_metrics：采集阶段/决策耗时，以可序列化快照返回（"metrics"），由父进程合并到自己的注册表
+    """
+    stats_store = StatsStore(stats_db) if stats_db else None
+    metrics = GameMetrics() if collect_metrics else None
+    moderator_kwargs = {"seed": seed, **(moderator_kwargs or {})}
+    moderator = ModeratorAgent(quiet=True, stats_store=stats_store, metrics=metrics, **moderator_kwargs)
+    try:
+        results = asyncio.run(moderator.run(total_games))
+    finally:
+        if stats_store is not None:
+            stats_store.close()
+    good_wins = sum(1 for r in results if r["winner"] == "good")
+    return {
+        "games": moderator.game_count,
+        "winners": {"good": good_wins, "werewolf": len(results) - good_wins},
+        "final_stats": moderator.final_stats,
+        "target_history": {name: agent.target_history for name, agent in moderator.player_agents.items()},
+        "results": results if keep_results else [],
+        "metrics": metrics.registry.snapshot() if metrics else {}
+    }
+
+
+def merge_stats(stats_list: list) -> dict:
+    """合并多个final_stats表：累加总局数、胜场数，重新计算胜率"""
+    merged = {}
+    for stats in stats_list:
+        for name, s in stats.items():
+            m = merged.setdefault(name, {"total": 0, "wins": 0, "win_rate": 0.0})
+            m["total"] += s["total"]
+            m["wins"] += s["wins"]
+    for m in merged.values():
+        m["win_rate"] = round(m["wins"] / m["total"], 2) if m["total"] > 0 else 0.0
+    return merged
+
+
+def merge_target_history(history_list: list) -> dict:
+    """合并多个{玩家: target_history}：按目标累加win/total计数"""
+    merged = {}
+    for histories in history_list:
+        for name, target_history in histories.items():
+            player_merged = merged.setdefault(name, {})
+            for target, s in target_history.items():
+                m = player_merged.setdefault(target, {"win": 0, "total": 0})
+                m["win"] += s["win"]
+                m["total"] += s["total"]
+    return merged
+
+
+def merge_outputs(outputs: list) -> dict:
+    """合并多个play_games的输出为一份锦标赛结果"""
+    return {
+        "games": sum(o["games"] for o in outputs),
+        "winners": {
+            "good": sum(o["winners"]["good"] for o in outputs),
+            "werewolf": sum(o["winners"]["werewolf"] for o in outputs)
+        },
+        "final_stats": merge_stats([o["final_stats"] for o in outputs]),
+        "target_history": merge_target_history([o["target_history"] for o in outputs]),
+        "results": [r for o in outputs for r in o["results"]]
+    }
+
+
+def split_games(total_games: int, workers: int) -> list:
+    """将总局数尽量均匀地分给各进程"""
+    base, extra = divmod(total_games, workers)
+    chunks = [base + (1 if i < extra else 0) for i in range(workers)]
+    return [n for n in chunks if n > 0]
+
+
+def run_tournament(total_games: int = TOTAL_GAMES, workers: int = None, seed: int = None, keep_results: bool = False,
+                   moderator_kwargs: dict = None, stats_db: str = None) -> dict:
+    """多进程锦标赛：对局分散到进程池，每个进程独立种子，结果合并为一份final_stats和target_history"""
+    workers = workers or os.cpu_count() or 1
+    seed_rng = random.Random(seed)
+    chunks = split_games(total_games, workers)
+    seeds = [seed_rng.getrandbits(32) for _ in chunks]
+
+    start = time.perf_counter()
+    if len(chunks) <= 1:
+        # 单进程时直接在当前进程运行，避免进程池启动开销
+        outputs = [play_games(n, s, keep_results, moderator_kwargs, stats_db) for n, s in zip(chunks, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            outputs = list(pool.map(play_games, chunks, seeds, [keep_results] * len(chunks),
+                                    [moderator_kwargs] * len(chunks), [stats_db] * len(chunks)))
+    elapsed = time.perf_counter() - start
+
+    merged = merge_outputs(outputs)
+    merged["workers"] = len(chunks)
+    merged["elapsed"] = elapsed
+    merged["games_per_sec"] = merged["games"] / max(elapsed, 1e-9)
+    return merged
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="多进程狼人杀锦标赛")
+    parser.add_argument("--games", type=int, default=1000, help="总对局数")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="进程数（默认CPU核数）")
+    parser.add_argument("--seed", type=int, default=None, help="主随机种子")
+    parser.add_argument("--speedup", action="store_true", help="先单进程再多进程运行，汇报加速比")
+    parser.add_argument("--players", type=int, default=None, help="桌大小（默认九人局）")
+    parser.add_argument("--stats-db", default=None, help="把每局胜负写入该SQLite统计库（stats_store.py）")
+    args = parser.parse_args()
+    moderator_kwargs = {"num_players": args.players} if args.players else None
+
+    baseline = None
+    if args.speedup:
+        baseline = run_tournament(args.games, workers=1, seed=args.seed, moderator_kwargs=moderator_kwargs)
+        print(f"1 worker: {baseline['games_per_sec']:.1f} games/sec ({baseline['elapsed']:.2f}s)")
+
+    tournament = run_tournament(args.games, workers=args.workers, seed=args.seed, moderator_kwargs=moderator_kwargs,
+                                stats_db=args.stats_db)
+    print(f"{tournament['workers']} workers: {tournament['games_per_sec']:.1f} games/sec ({tournament['elapsed']:.2f}s)")
+    if baseline:
+        speedup = tournament["games_per_sec"] / max(baseline["games_per_sec"], 1e-9)
+        print(f"Speedup: {speedup:.2f}x (efficiency {speedup / tournament['workers']:.0%})")
+    print(f"Good wins: {tournament['winners']['good']} | Werewolf wins: {tournament['winners']['werewolf']}")
+
+    # 复用主持人的排名展示
+    moderator = ModeratorAgent(**(moderator_kwargs or {}))
+    moderator.game_count = tournament["games"]
+    moderator.final_stats = tournament["final_stats"]
+    asyncio.run(moderator.show_final_ranking())